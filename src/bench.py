@@ -0,0 +1,162 @@
+"""
+Headless benchmark: runs a path planner over every track of data/ and
+records per-stage timings, peak memory and path statistics.
+
+    python src/bench.py --planner rrt --seed 0 --out bench_results
+"""
+import argparse
+import csv
+import json
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from core.collision import COLLISION_Z
+from core.planners import available_planners, create_planner
+from core.spatial_index import preload_kdtree
+from core.track_context import TrackContext
+from core.velocity_profile import lap_time
+from utils.track_utils import load_track_arrays
+
+ROOT = Path(__file__).resolve().parents[1]
+PLANNERS = tuple(available_planners())
+FIELDS = ["planner", "track", "n_cones", "load", "pairing", "ordering", "planning", "smoothing", "total",
+          "peak_memory_kb", "raw_points", "points", "path_length", "lap_time", "segments", "fallback_segments",
+          "grid_segments"]
+
+
+def path_length(path):
+    if len(path) < 2:
+        return 0.0
+    return float(np.hypot(*np.diff(np.asarray(path, dtype=float), axis=0).T).sum())
+
+
+def run_track(planner, csv_path, seed, workers, use_cache, spacing=None, instrument=False, collision_z=COLLISION_Z):
+    """
+    Loads, plans and smooths one track. Returns the result row (times in seconds);
+    with instrument, row["instrumentation"] holds the planner counters, timers and events.
+    """
+    t0 = time.perf_counter()
+    track = load_track_arrays(csv_path, use_cache=use_cache)
+    load_time = time.perf_counter() - t0
+
+    processor = create_planner(planner, seed=seed, workers=workers, instrument=instrument, collision_z=collision_z)
+    raw_path = processor.compute_from_context(TrackContext.from_track(track))
+
+    t0 = time.perf_counter()
+    final_path = processor.smooth_path(raw_path, spacing) if raw_path else []
+    smoothing_time = time.perf_counter() - t0
+
+    stats = processor.stats
+    row = {
+        "planner": planner,
+        "track": Path(csv_path).name,
+        "n_cones": len(track),
+        "load": load_time,
+        "pairing": stats.get("pairing", 0.0),
+        "ordering": stats.get("ordering", 0.0),
+        "planning": stats.get("planning", 0.0),
+        "smoothing": smoothing_time,
+        "raw_points": len(raw_path),
+        "points": len(final_path),
+        "path_length": path_length(final_path),
+        "lap_time": lap_time(final_path) if len(final_path) > 2 else None,
+        "segments": stats.get("segments", 0),
+        "fallback_segments": stats.get("fallback_segments", 0),
+        "grid_segments": stats.get("grid_segments", 0),
+    }
+    row["total"] = sum(row[k] for k in ("load", "pairing", "ordering", "planning", "smoothing"))
+    if processor.instrumentation is not None:
+        row["instrumentation"] = processor.instrumentation.as_dict()
+    return row
+
+
+def peak_memory(planner, csv_path, seed, workers, use_cache, spacing=None, collision_z=COLLISION_Z):
+    """Peak traced allocation (KiB) of a second, identical run: tracing would skew the timings."""
+    tracemalloc.start()
+    try:
+        run_track(planner, csv_path, seed, workers, use_cache, spacing, collision_z=collision_z)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def write_results(rows, meta, prefix):
+    prefix = Path(prefix)
+    prefix.parent.mkdir(parents=True, exist_ok=True)
+    with open(prefix.with_suffix(".json"), "w") as f:
+        json.dump({"meta": meta, "results": rows}, f, indent=2)
+    with open(prefix.with_suffix(".csv"), "w", newline="") as f:
+        # Instrumentation (nested) is only written to the JSON file
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the path planners over the tracks of data/.")
+    parser.add_argument("--planner", choices=PLANNERS + ("all",), default="all")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the RRT* planner")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used by the RRT* planner")
+    parser.add_argument("--tracks", default="*.csv", help="Glob pattern of the tracks, relative to --data")
+    parser.add_argument("--data", type=Path, default=ROOT / "data")
+    parser.add_argument("--out", default="bench_results", help="Output prefix (.json and .csv are written)")
+    parser.add_argument("--spacing", type=float, default=None, help="Arc-length spacing (m) of the smoothed path")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory run")
+    parser.add_argument("--no-cache", action="store_true", help="Always parse the CSV files")
+    parser.add_argument("--collision-z", type=float, default=COLLISION_Z,
+                        help=f"RRT* cone margins from the cone position covariances, at Z standard deviations "
+                             f"(default {COLLISION_Z:g})")
+    parser.add_argument("--fixed-margin", action="store_true",
+                        help="Fixed 1.2 m RRT* margin around every cone, whatever its covariance")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Record the planner counters, timers and per-segment events in the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Every run is smoothed with SciPy: imported once, before the first timed load
+    preload_kdtree()
+    collision_z = None if args.fixed_margin else args.collision_z
+    planners = PLANNERS if args.planner == "all" else (args.planner,)
+    # Smallest tracks first, so scaling is readable in the output
+    tracks = sorted(args.data.glob(args.tracks), key=lambda p: (p.stat().st_size, p.name))
+    if not tracks:
+        print(f"No track matches {args.tracks!r} in {args.data}")
+        return 1
+
+    rows = []
+    for planner in planners:
+        for csv_path in tracks:
+            row = run_track(planner, csv_path, args.seed, args.workers, not args.no_cache, args.spacing,
+                            args.instrument, collision_z)
+            row["peak_memory_kb"] = None if args.no_memory else peak_memory(
+                planner, csv_path, args.seed, args.workers, not args.no_cache, args.spacing, collision_z)
+            rows.append(row)
+            print(f"{planner:>12} {row['track']:<36} total {row['total'] * 1000:9.1f} ms"
+                  f"  planning {row['planning'] * 1000:9.1f} ms"
+                  f"  length {row['path_length']:8.1f} m  lap {row['lap_time'] or 0:7.2f} s  fallbacks {row['fallback_segments']}")
+
+    meta = {"revision": git_revision(), "seed": args.seed, "workers": args.workers, "spacing": args.spacing,
+            "collision_z": collision_z,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    write_results(rows, meta, args.out)
+    print(f"Results written to {args.out}.json and {args.out}.csv")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
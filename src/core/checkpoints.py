@@ -0,0 +1,53 @@
+import numpy as np
+
+from core.spatial_index import nearest_neighbours
+
+
+def pair_midpoints(yellow, blue):
+    """
+    Pairs each yellow cone with its nearest blue cone and returns the midpoints.
+    Also returns the index of the paired blue cone for each yellow cone.
+    """
+    yellow = np.asarray(yellow, dtype=float).reshape(-1, 2)
+    blue = np.asarray(blue, dtype=float).reshape(-1, 2)
+    if len(yellow) == 0 or len(blue) == 0:
+        return np.empty((0, 2)), np.empty(0, dtype=np.intp)
+
+    nearest_blue = nearest_neighbours(blue, yellow)
+    midpoints = (yellow + blue[nearest_blue]) / 2
+    return midpoints, nearest_blue
+
+
+def order_checkpoints(points, start_pos):
+    """
+    Greedy nearest-neighbour ordering of the points, starting with the point
+    closest to start_pos. Returns the list of indices in visiting order.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    n_points = len(points)
+    if n_points == 0:
+        return []
+
+    base_k = min(8, n_points)
+    # The neighbours of every point at once; the rare points whose neighbours were all
+    # visited take the nearest unvisited point of the whole set
+    neighbours = nearest_neighbours(points, points, k=base_k).reshape(n_points, base_k)
+    current_idx = int(nearest_neighbours(points, start_pos)[0])
+
+    sorted_indices = [current_idx]
+    visited = np.zeros(n_points, dtype=bool)
+    visited[current_idx] = True
+
+    while len(sorted_indices) < n_points:
+        candidates = neighbours[current_idx]
+        unvisited = candidates[~visited[candidates]]
+        if len(unvisited):
+            current_idx = int(unvisited[0])
+        else:
+            remaining = np.flatnonzero(~visited)
+            d2 = ((points[remaining] - points[current_idx]) ** 2).sum(axis=1)
+            current_idx = int(remaining[np.argmin(d2)])
+        sorted_indices.append(current_idx)
+        visited[current_idx] = True
+
+    return sorted_indices
@@ -0,0 +1,157 @@
+import math
+
+import numpy as np
+
+# Standard deviations added to the cone margins by default (chance_constrained_radii):
+# a cone lies beyond its margin with a probability of about 0.1 % along any direction
+COLLISION_Z = 3.0
+
+
+class ConeCollisionChecker:
+    """
+    Collision backend built once per track: a KD-tree over the cone centres,
+    each cone carrying its own collision radius.
+    """
+
+    def __init__(self, centers, radii):
+        self.centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+        self.radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(self.centers),)).copy()
+        self.max_radius = float(self.radii.max()) if len(self.radii) else 0.0
+        self.uniform = bool(len(self.radii) == 0 or np.all(self.radii == self.max_radius))
+        # SciPy is imported with the first checker, not with the planner modules
+        from scipy.spatial import cKDTree
+        self.tree = cKDTree(self.centers) if len(self.centers) else None
+        # Python copies for the scalar fast path, where NumPy call overhead dominates
+        self._center_list = self.centers.tolist()
+        self._radius_list = self.radii.tolist()
+
+    @classmethod
+    def from_obstacle_list(cls, obstacle_list):
+        """Builds the checker from a list of (x, y, radius) tuples."""
+        arr = np.asarray(obstacle_list, dtype=float).reshape(-1, 3)
+        return cls(arr[:, :2], arr[:, 2])
+
+    def points_free(self, xs, ys):
+        """
+        Returns True if none of the points lies within the radius of a cone.
+        """
+        if self.tree is None:
+            return True
+        pts = np.column_stack((np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)))
+        if len(pts) == 0:
+            return True
+
+        if self.uniform:
+            # The nearest cone is enough when every cone has the same radius
+            d, _ = self.tree.query(pts, distance_upper_bound=np.nextafter(self.max_radius, np.inf))
+            return not np.any(d <= self.max_radius)
+
+        pt_idx, cone_idx = self._candidate_pairs(pts, self.max_radius)
+        d2 = ((self.centers[cone_idx] - pts[pt_idx]) ** 2).sum(axis=1)
+        return not np.any(d2 <= self.radii[cone_idx] ** 2)
+
+    def points_free_mask(self, xs, ys):
+        """
+        Vectorized version of points_free: boolean array, True for each point
+        outside the radius of every cone.
+        """
+        pts = np.column_stack((np.asarray(xs, dtype=float).ravel(), np.asarray(ys, dtype=float).ravel()))
+        free = np.ones(len(pts), dtype=bool)
+        if self.tree is None or len(pts) == 0:
+            return free
+
+        if self.uniform:
+            d, _ = self.tree.query(pts, distance_upper_bound=np.nextafter(self.max_radius, np.inf))
+            return ~(d <= self.max_radius)
+
+        pt_idx, cone_idx = self._candidate_pairs(pts, self.max_radius)
+        d2 = ((self.centers[cone_idx] - pts[pt_idx]) ** 2).sum(axis=1)
+        free[pt_idx[d2 <= self.radii[cone_idx] ** 2]] = False
+        return free
+
+    def segments_free(self, x0, y0, x1, y1):
+        """
+        Vectorized check of the segments (x0, y0) -> (x1, y1).
+        Returns a boolean array, True where the segment clears every cone.
+        """
+        x0, y0, x1, y1 = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=float)) for v in (x0, y0, x1, y1)))
+        p0 = np.column_stack((x0, y0))
+        p1 = np.column_stack((x1, y1))
+        free = np.ones(len(p0), dtype=bool)
+        if self.tree is None or len(p0) == 0:
+            return free
+
+        # Only the cones within reach of the segment's bounding circle can touch it
+        mid = (p0 + p1) / 2.0
+        reach = np.hypot(p1[:, 0] - p0[:, 0], p1[:, 1] - p0[:, 1]) / 2.0 + self.max_radius
+        seg_idx, cone_idx = self._candidate_pairs(mid, reach)
+        if len(seg_idx) == 0:
+            return free
+
+        a = p0[seg_idx]
+        ab = p1[seg_idx] - a
+        ac = self.centers[cone_idx] - a
+        len2 = (ab * ab).sum(axis=1)
+        t = np.divide((ac * ab).sum(axis=1), len2, out=np.zeros_like(len2), where=len2 > 0)
+        np.clip(t, 0.0, 1.0, out=t)
+        closest = a + t[:, None] * ab
+        d2 = ((self.centers[cone_idx] - closest) ** 2).sum(axis=1)
+
+        hit = d2 <= self.radii[cone_idx] ** 2
+        free[seg_idx[hit]] = False
+        return free
+
+    def segment_free(self, x0, y0, x1, y1):
+        """Scalar version of segments_free for a single segment."""
+        if self.tree is None:
+            return True
+        dx = x1 - x0
+        dy = y1 - y0
+        reach = math.hypot(dx, dy) / 2.0 + self.max_radius
+        candidates = self.tree.query_ball_point((x0 + dx / 2.0, y0 + dy / 2.0), reach)
+        len2 = dx * dx + dy * dy
+        for i in candidates:
+            cx, cy = self._center_list[i]
+            t = ((cx - x0) * dx + (cy - y0) * dy) / len2 if len2 > 0 else 0.0
+            t = min(1.0, max(0.0, t))
+            ex = x0 + t * dx - cx
+            ey = y0 + t * dy - cy
+            if ex * ex + ey * ey <= self._radius_list[i] ** 2:
+                return False
+        return True
+
+    def _candidate_pairs(self, pts, r):
+        """
+        Returns (query index, cone index) arrays for every cone within r of each query point.
+        """
+        candidates = self.tree.query_ball_point(pts, r, return_sorted=False)
+        counts = np.fromiter((len(c) for c in candidates), dtype=np.intp, count=len(candidates))
+        if counts.sum() == 0:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+        cone_idx = np.concatenate([c for c in candidates if c]).astype(np.intp)
+        query_idx = np.repeat(np.arange(len(pts)), counts)
+        return query_idx, cone_idx
+
+
+def chance_constrained_radii(covariances, base_radius, z=COLLISION_Z):
+    """
+    Collision radius of each cone from its position covariance (x_variance,
+    y_variance, xy_covariance): base_radius plus z standard deviations along
+    the major axis of the uncertainty ellipse. The circle encloses the
+    z-sigma ellipse, so the margin holds in every direction; well-localised
+    cones get a radius close to base_radius.
+    """
+    cov = np.asarray(covariances, dtype=float).reshape(-1, 3)
+    var_x, var_y, cov_xy = cov[:, 0], cov[:, 1], cov[:, 2]
+    # Largest eigenvalue of [[var_x, cov_xy], [cov_xy, var_y]]
+    half_trace = (var_x + var_y) / 2
+    lambda_max = half_trace + np.sqrt(((var_x - var_y) / 2) ** 2 + cov_xy ** 2)
+    return base_radius + z * np.sqrt(np.maximum(lambda_max, 0.0))
+
+
+def as_collision_checker(obstacles):
+    """Accepts either a ConeCollisionChecker or a list of (x, y, radius) tuples."""
+    if isinstance(obstacles, ConeCollisionChecker):
+        return obstacles
+    return ConeCollisionChecker.from_obstacle_list(obstacles)
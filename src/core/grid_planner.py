@@ -0,0 +1,174 @@
+import heapq
+import math
+
+import numpy as np
+
+# 8-connected moves (dx, dy, cost in cells)
+_MOVES = [(dx, dy, math.hypot(dx, dy)) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+# Virtual node of the search, past the cells where a path may end
+_GOAL = (-1, -1)
+
+
+def grid_path(start, goal, collision_checker, resolution=0.25, margin=3.0, max_cells=40000, min_resolution=0.06,
+              snap_distance=3.0):
+    """
+    Deterministic A* between start and goal on a coarse grid over the box
+    around the segment (plus margin, in metres), for segments RRT* could not
+    connect. Cells whose centre lies within a cone radius are blocked.
+    A start or goal within a cone radius (checkpoint of a corridor narrower
+    than two margins) cannot be reached by a free segment: the search then
+    starts from (ends at) any free cell within snap_distance of it, the
+    distance to the end point being added to the path cost. The path still
+    begins at start and ends at goal, only its first (last) step crosses the margin.
+    If the corridor is closed at this resolution (gap narrower than a cell),
+    the search is repeated with cells half as large, down to min_resolution.
+    The cell path is then shortened by keeping, from each point, the furthest
+    point reachable in a straight line; every segment of the result is checked
+    with the collision checker.
+    Returns [[x, y], ...] from start to goal, or None if no path exists in the
+    box (no free cell near a blocked end point, corridor closed at min_resolution).
+    """
+    checker = collision_checker
+    x0, y0 = float(start[0]), float(start[1])
+    x1, y1 = float(goal[0]), float(goal[1])
+    start_free, goal_free = checker.points_free_mask((x0, x1), (y0, y1)).tolist()
+    if start_free and goal_free and checker.segment_free(x0, y0, x1, y1):
+        return [[x0, y0], [x1, y1]]
+
+    margin = max(margin, snap_distance)
+    while True:
+        path, used = _grid_search(x0, y0, x1, y1, start_free, goal_free, checker, resolution, margin, max_cells,
+                                  snap_distance)
+        # Finer cells would not help once max_cells sets the resolution
+        if path is not None or used > resolution or resolution / 2 < min_resolution:
+            return path
+        resolution /= 2
+
+
+def _grid_search(x0, y0, x1, y1, start_free, goal_free, checker, resolution, margin, max_cells, snap_distance):
+    """A* on one grid. Returns (path or None, resolution actually used)."""
+    lo_x, lo_y = min(x0, x1) - margin, min(y0, y1) - margin
+    nx = int(math.ceil((max(x0, x1) + margin - lo_x) / resolution)) + 1
+    ny = int(math.ceil((max(y0, y1) + margin - lo_y) / resolution)) + 1
+    if nx * ny > max_cells:
+        # Long segment: coarser cells, same number of them at most
+        resolution *= math.sqrt(nx * ny / max_cells)
+        nx = int(math.ceil((max(x0, x1) + margin - lo_x) / resolution)) + 1
+        ny = int(math.ceil((max(y0, y1) + margin - lo_y) / resolution)) + 1
+
+    gx, gy = np.meshgrid(lo_x + resolution * np.arange(nx), lo_y + resolution * np.arange(ny), indexing="ij")
+    free_mask = checker.points_free_mask(gx, gy).reshape(nx, ny)
+
+    def end_cells(x, y, is_free):
+        """{cell: cost (in cells) from the end point} of the cells a path may start or end at."""
+        if is_free:
+            # A free end point: its cell is usable even if the cell centre is not
+            c = (min(nx - 1, max(0, int(round((x - lo_x) / resolution)))),
+                 min(ny - 1, max(0, int(round((y - lo_y) / resolution)))))
+            free_mask[c] = True
+            return {c: 0.0}
+        dist = np.hypot(gx - x, gy - y) / resolution
+        ii, jj = np.nonzero(free_mask & (dist <= snap_distance / resolution))
+        return {(i, j): d for i, j, d in zip(ii.tolist(), jj.tolist(), dist[ii, jj].tolist())}
+
+    sources = end_cells(x0, y0, start_free)
+    targets = end_cells(x1, y1, goal_free)
+    if not sources or not targets:
+        return None, resolution
+    free = free_mask.tolist()
+
+    gi, gj = (x1 - lo_x) / resolution, (y1 - lo_y) / resolution
+    if goal_free:
+        gi, gj = next(iter(targets))
+
+        def heuristic(i, j):
+            # Octile distance, admissible on an 8-connected grid
+            di, dj = abs(i - gi), abs(j - gj)
+            return max(di, dj) + (math.sqrt(2) - 1) * min(di, dj)
+    else:
+        def heuristic(i, j):
+            # Straight-line distance to the goal: admissible whatever the target cell
+            return math.hypot(i - gi, j - gj)
+
+    # (f, insertion counter, cell): the counter makes the expansion order deterministic.
+    # _GOAL is reached from a target cell, at the cost of its distance to the goal.
+    counter = 0
+    heap = []
+    cost, parent = {}, {}
+    for c, d in sources.items():
+        cost[c] = d
+        parent[c] = None
+        counter += 1
+        heap.append((d + heuristic(*c), counter, c))
+    heapq.heapify(heap)
+    closed = set()
+    while heap:
+        _, _, current = heapq.heappop(heap)
+        if current == _GOAL:
+            break
+        if current in closed:
+            continue
+        closed.add(current)
+        if current in targets:
+            new_cost = cost[current] + targets[current]
+            if new_cost < cost.get(_GOAL, math.inf):
+                cost[_GOAL] = new_cost
+                parent[_GOAL] = current
+                counter += 1
+                heapq.heappush(heap, (new_cost, counter, _GOAL))
+        i, j = current
+        for dx, dy, step in _MOVES:
+            ni, nj = i + dx, j + dy
+            if not (0 <= ni < nx and 0 <= nj < ny) or not free[ni][nj]:
+                continue
+            new_cost = cost[current] + step
+            nxt = (ni, nj)
+            if new_cost < cost.get(nxt, math.inf):
+                cost[nxt] = new_cost
+                parent[nxt] = current
+                counter += 1
+                heapq.heappush(heap, (new_cost + heuristic(ni, nj), counter, nxt))
+    else:
+        return None, resolution
+
+    cells = []
+    current = parent[_GOAL]
+    while current is not None:
+        cells.append(current)
+        current = parent[current]
+    cells.reverse()
+    points = [[lo_x + i * resolution, lo_y + j * resolution] for i, j in cells]
+    # Free end points replace the centre of their cell, blocked ones are joined to the path as is
+    if start_free:
+        points[0] = [x0, y0]
+    if goal_free:
+        points[-1] = [x1, y1]
+    if len(points) == 1:
+        points.append(list(points[0]))
+    path = shortcut_path(points, checker)
+    if path is None:
+        return None, resolution
+    if not start_free:
+        path.insert(0, [x0, y0])
+    if not goal_free:
+        path.append([x1, y1])
+    return path, resolution
+
+
+def shortcut_path(points, collision_checker):
+    """
+    Keeps, from each point, the furthest later point joined by a free segment.
+    Returns None if two consecutive points cannot be joined.
+    """
+    pts = np.asarray(points, dtype=float)
+    path = [points[0]]
+    i = 0
+    while i < len(pts) - 1:
+        rest = pts[i + 1:]
+        free = collision_checker.segments_free(pts[i, 0], pts[i, 1], rest[:, 0], rest[:, 1])
+        reachable = np.flatnonzero(free)
+        if len(reachable) == 0:
+            return None
+        i += 1 + int(reachable[-1])
+        path.append(points[i])
+    return path
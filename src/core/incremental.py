@@ -0,0 +1,484 @@
+import math
+import time
+
+import numpy as np
+
+from core.instrumentation import timer
+from core.process_path import PathProcessor
+from core.spatial_index import SpatialHashGrid
+
+# A replayed track trusts pairs and links up to this many times its measured
+# width or checkpoint spacing (95th percentile), whichever is larger
+WIDTH_MARGIN = 1.5
+
+
+class _ConeSet:
+    """
+    Cones of one colour, with inverse-variance fusion of repeated detections.
+    """
+
+    def __init__(self, cell_size):
+        self.xs = []
+        self.ys = []
+        self.var_x = []
+        self.var_y = []
+        self.grid = SpatialHashGrid(cell_size)
+
+    def __len__(self):
+        return len(self.xs)
+
+    def add(self, x, y, var_x, var_y, merge_dist):
+        """
+        Adds a detection. Returns (index, True) for a new cone, or (index, False)
+        when it was fused with an existing cone closer than merge_dist.
+        """
+        if self.xs:
+            i = self.grid.nearest(x, y)
+            if math.hypot(self.xs[i] - x, self.ys[i] - y) <= merge_dist:
+                self.xs[i], self.var_x[i] = _fuse(self.xs[i], self.var_x[i], x, var_x)
+                self.ys[i], self.var_y[i] = _fuse(self.ys[i], self.var_y[i], y, var_y)
+                self.grid.move(i, self.xs[i], self.ys[i])
+                return i, False
+
+        self.xs.append(x)
+        self.ys.append(y)
+        self.var_x.append(var_x)
+        self.var_y.append(var_y)
+        return self.grid.insert(x, y), True
+
+
+def _fuse(value, var, new_value, new_var):
+    # Without usable variances both detections weigh the same
+    if var <= 0 or new_var <= 0:
+        return (value + new_value) / 2, max(var, new_var)
+    w, new_w = 1.0 / var, 1.0 / new_var
+    return (value * w + new_value * new_w) / (w + new_w), 1.0 / (w + new_w)
+
+
+def _track_scale(context):
+    """95th percentile of the pair widths and checkpoint steps of context (m)."""
+    order = context.order
+    widths = np.hypot(*(context.yellow[order] - context.blue[context.nearest_blue[order]]).T)
+    steps = np.hypot(*np.diff(context.midpoints[order], axis=0).T)
+    return float(np.percentile(np.concatenate((widths, steps)), 95))
+
+
+def catmull_rom(p0, p1, p2, p3, n):
+    """
+    n points of the centripetal Catmull-Rom curve from p1 (included) to p2 (excluded).
+    """
+    p0, p1, p2, p3 = (np.asarray(p, dtype=float) for p in (p0, p1, p2, p3))
+    eps = 1e-9
+    t1 = max(np.hypot(*(p1 - p0)) ** 0.5, eps)
+    t2 = t1 + max(np.hypot(*(p2 - p1)) ** 0.5, eps)
+    t3 = t2 + max(np.hypot(*(p3 - p2)) ** 0.5, eps)
+
+    t = np.linspace(t1, t2, n, endpoint=False)[:, None]
+    a1 = ((t1 - t) * p0 + t * p1) / t1
+    a2 = ((t2 - t) * p1 + (t - t1) * p2) / (t2 - t1)
+    a3 = ((t3 - t) * p2 + (t - t2) * p3) / (t3 - t2)
+    b1 = ((t2 - t) * a1 + t * a2) / t2
+    b2 = ((t3 - t) * a2 + (t - t1) * a3) / (t3 - t1)
+    return ((t2 - t) * b1 + (t - t1) * b2) / (t2 - t1)
+
+
+class IncrementalPathProcessor(PathProcessor):
+    """
+    Streaming centerline for cones perceived incrementally.
+
+    Each yellow cone is paired with its nearest blue cone; the midpoints form a
+    chain (doubly linked list) extended by cheapest insertion, and each chain
+    edge carries its own centripetal Catmull-Rom section. A batch of cones only
+    touches the pairs, chain links and spline sections around it, so the cost of
+    an update does not depend on the length of the track already mapped.
+
+    path() is the live preview between two perception updates: a splprep fit
+    covers the whole path, so refitting it at every update would cost the
+    length of the track. The final path goes through the shared pipeline of
+    the other planners (smooth_path, inherited from the midpoints PathProcessor).
+    As a registered planner ("incremental"), compute_from_context replays a
+    track as a perception stream, batch_size checkpoints at a time in driving order,
+    with max_width widened to the widths measured on the track.
+    """
+
+    def __init__(self, start_pos=None, merge_dist=0.5, spacing=0.5, cell_size=5.0, max_width=8.0, batch_size=4,
+                 instrumentation=None):
+        super().__init__(instrumentation=instrumentation)
+        # The chain starts with the midpoint closest to start_pos (car position)
+        self.start_pos = start_pos
+        self.merge_dist = merge_dist
+        # Yellow/blue pairs (and chain links) further apart than this are not trusted yet
+        self.max_width = max_width
+        self.base_max_width = max_width
+        self.spacing = spacing  # Spline sample spacing (m)
+        self.cell_size = cell_size
+        self.batch_size = batch_size
+        self.reset()
+
+    def reset(self):
+        """Forgets every cone, e.g. before a new run."""
+        cell_size = self.cell_size
+        self.yellow = _ConeSet(cell_size)
+        self.blue = _ConeSet(cell_size)
+
+        # Per yellow cone (node id = yellow index)
+        self.pair = []
+        self.node_grid_id = []
+        self.prev = []
+        self.next = []
+        self.grid_node = []  # midpoint grid id -> node id
+        self.mid_grid = SpatialHashGrid(cell_size)
+        self.pending = set()  # yellow cones without a blue cone within max_width
+        self.detached = set()  # midpoints too far from the chain to be linked yet
+
+        self.head = -1
+        self.tail = -1
+        self.closed = False
+        self.sections = {}  # node id -> points of the edge node -> next[node]
+
+    def add_cones(self, cones):
+        """
+        Integrates a batch of detections: dicts with "tag", "x", "y" and optionally
+        "x_variance"/"y_variance" (same schema as the track CSVs).
+        Returns the ids of the chain nodes whose spline section was recomputed.
+        """
+        changed_yellow = set()
+        for c in cones:
+            tag = c["tag"]
+            if tag not in ("yellow", "blue"):
+                continue
+            x, y = float(c["x"]), float(c["y"])
+            var_x = float(c.get("x_variance", 0.0) or 0.0)
+            var_y = float(c.get("y_variance", 0.0) or 0.0)
+
+            if tag == "yellow":
+                i, is_new = self.yellow.add(x, y, var_x, var_y, self.merge_dist)
+                if is_new:
+                    self._new_node()
+                changed_yellow.add(i)
+            else:
+                i, _ = self.blue.add(x, y, var_x, var_y, self.merge_dist)
+                changed_yellow.update(self._yellow_near_blue(i))
+
+        dirty = set()
+        to_insert = []
+        for yi in sorted(changed_yellow):
+            if self._pair_yellow(yi, dirty):
+                to_insert.append(yi)
+        self._insert_batch(to_insert, dirty)
+
+        for n in dirty:
+            self._update_section(n)
+        return sorted(dirty)
+
+    def compute_from_context(self, context, on_segment=None):
+        """
+        Replays the cones of context (TrackContext) as a perception stream: each
+        batch holds the yellow cones of batch_size checkpoints in driving order and
+        their paired blue cones, the unpaired cones come last. The loop is closed
+        if context.closed. stats gets the number and durations (s) of the updates.
+        If the chain does not cover every checkpoint (cones too far apart to be
+        linked), the batch midpoints order is returned instead, with stats["fallback"].
+        Returns the raw centerline; on_segment(points) receives it once complete.
+        """
+        self.stats = {}
+        yellow, blue, nearest_blue = context.yellow, context.blue, context.nearest_blue
+        cov = context.covariances
+        if len(yellow) == 0 or len(blue) == 0:
+            return []
+        self.max_width = max(self.base_max_width, WIDTH_MARGIN * _track_scale(context))
+        self.reset()
+        self.start_pos = context.start_pos
+
+        def cone(tag, points, i, offset):
+            c = {"tag": tag, "x": points[i, 0], "y": points[i, 1]}
+            if cov is not None:
+                c["x_variance"], c["y_variance"] = cov[offset + i, 0], cov[offset + i, 1]
+            return c
+
+        order = list(context.order)
+        batches = []
+        seen_yellow, seen_blue = set(), set()
+        for k in range(0, len(order), self.batch_size):
+            batch = []
+            for i in order[k:k + self.batch_size]:
+                seen_yellow.add(i)
+                batch.append(cone("yellow", yellow, i, 0))
+                b = int(nearest_blue[i])
+                if b not in seen_blue:
+                    seen_blue.add(b)
+                    batch.append(cone("blue", blue, b, len(yellow)))
+            batches.append(batch)
+        batches.append([cone("yellow", yellow, i, 0) for i in range(len(yellow)) if i not in seen_yellow] +
+                       [cone("blue", blue, b, len(yellow)) for b in range(len(blue)) if b not in seen_blue])
+
+        durations = []
+        for batch in batches:
+            t0 = time.perf_counter()
+            with timer(self.instrumentation, "update"):
+                self.add_cones(batch)
+            durations.append(time.perf_counter() - t0)
+        if context.closed:
+            self.close_loop()
+        self.stats["updates"] = len(durations)
+        self.stats["update_mean"] = sum(durations) / len(durations)
+        self.stats["update_max"] = max(durations)
+        self.stats["max_width"] = self.max_width
+
+        if len(self._walk()) < len(self.pair):
+            print("Warning: the incremental chain does not link every checkpoint, using the midpoints order.")
+            stats = self.stats
+            path = super().compute_from_context(context, on_segment)
+            self.stats = dict(stats, fallback=True, **self.stats)
+            return path
+        self.stats["fallback"] = False
+
+        path = self.centerline()
+        if path and self.closed:
+            path.append(path[0])
+        if self.instrumentation is not None:
+            self.instrumentation.event("compute", planner="incremental", **self.stats)
+        if on_segment is not None and path:
+            on_segment(path)
+        return path
+
+    def close_loop(self):
+        """Links the tail of the chain back to its head."""
+        if self.closed or self.head < 0 or self.head == self.tail:
+            return []
+        self.closed = True
+        self.next[self.tail] = self.head
+        self.prev[self.head] = self.tail
+        dirty = self._affected(self.tail) | self._affected(self.head)
+        for n in dirty:
+            self._update_section(n)
+        return sorted(dirty)
+
+    def midpoint(self, n):
+        gx = self.node_grid_id[n]
+        return self.mid_grid.xs[gx], self.mid_grid.ys[gx]
+
+    def centerline(self):
+        """Ordered midpoints of the chain (raw centerline)."""
+        return [self.midpoint(n) for n in self._walk()]
+
+    def path(self):
+        """Concatenation of the spline sections, in driving order."""
+        nodes = self._walk()
+        if not nodes:
+            return []
+        pts = [self.sections[n] for n in nodes if n in self.sections]
+        last = self.head if self.closed else nodes[-1]
+        pts.append(np.array([self.midpoint(last)]))
+        return [tuple(p) for p in np.vstack(pts).tolist()]
+
+    def _walk(self):
+        nodes = []
+        n = self.head
+        while n >= 0:
+            nodes.append(n)
+            n = self.next[n]
+            if n == self.head:
+                break
+        return nodes
+
+    def _new_node(self):
+        self.pair.append(-1)
+        self.node_grid_id.append(-1)
+        self.prev.append(-1)
+        self.next.append(-1)
+
+    def _yellow_near_blue(self, bi):
+        """Yellow cones whose nearest blue cone may have changed because of blue cone bi."""
+        bx, by = self.blue.xs[bi], self.blue.ys[bi]
+        changed = []
+        for yi in self.yellow.grid.within_radius(bx, by, self.max_width + self.merge_dist):
+            if yi >= len(self.pair):
+                continue
+            pi = self.pair[yi]
+            # Only pairs that blue cone bi can take over (or that use it) are affected
+            if pi < 0 or pi == bi:
+                changed.append(yi)
+                continue
+            y_pos = (self.yellow.xs[yi], self.yellow.ys[yi])
+            if math.dist(y_pos, (bx, by)) < math.dist(y_pos, (self.blue.xs[pi], self.blue.ys[pi])):
+                changed.append(yi)
+        return changed
+
+    def _pair_yellow(self, yi, dirty):
+        """
+        Updates the pair and midpoint of yellow cone yi.
+        Returns True if the midpoint must be (re)inserted in the chain.
+        """
+        x, y = self.yellow.xs[yi], self.yellow.ys[yi]
+        bi = self.blue.grid.nearest(x, y) if len(self.blue) else None
+        if bi is None or math.hypot(self.blue.xs[bi] - x, self.blue.ys[bi] - y) > self.max_width:
+            # Not paired (anymore): the yellow cone stays out of the chain
+            self.pending.add(yi)
+            if self._in_chain(yi):
+                self._unlink(yi, dirty)
+            return False
+
+        self.pending.discard(yi)
+        bx, by = self.blue.xs[bi], self.blue.ys[bi]
+        self.pair[yi] = bi
+        mx, my = (x + bx) / 2, (y + by) / 2
+
+        gx = self.node_grid_id[yi]
+        if gx < 0:
+            self.node_grid_id[yi] = self.mid_grid.insert(mx, my)
+            self.grid_node.append(yi)
+            return True
+
+        if (self.mid_grid.xs[gx], self.mid_grid.ys[gx]) == (mx, my) and self._in_chain(yi):
+            return False
+        # The midpoint moved (new pairing): it may belong elsewhere in the chain
+        if self._in_chain(yi):
+            self._unlink(yi, dirty)
+        self.mid_grid.move(gx, mx, my)
+        return True
+
+    def _in_chain(self, n):
+        return n == self.head or self.prev[n] >= 0
+
+    def _unlink(self, n, dirty):
+        dirty |= self._affected(n)
+        a, b = self.prev[n], self.next[n]
+        if a >= 0:
+            self.next[a] = b
+        if b >= 0:
+            self.prev[b] = a
+        if self.head == n:
+            self.head = b if b != n else -1
+        if self.tail == n:
+            self.tail = a if a != n else -1
+        self.prev[n] = self.next[n] = -1
+        self.sections.pop(n, None)
+        dirty.discard(n)
+        for m in (a, b):
+            if m >= 0 and m != n:
+                dirty |= self._affected(m)
+
+    def _insert_batch(self, nodes, dirty):
+        """
+        Inserts the nodes one at a time, always picking the one with the cheapest
+        insertion first, so a batch is threaded along the chain in driving order.
+        Cost is quadratic in the batch size only.
+        """
+        remaining = list(nodes)
+        if not remaining:
+            return
+
+        if self.head < 0:
+            first = remaining[0]
+            if self.start_pos is not None:
+                first = min(remaining, key=lambda k: math.dist(self.midpoint(k), self.start_pos))
+            remaining.remove(first)
+            self.head = self.tail = first
+            dirty.add(first)
+
+        while remaining:
+            options = [opt + (n,) for n in remaining for opt in [self._best_insertion(n)] if opt is not None]
+            if not options:
+                self.detached.update(remaining)
+                break
+            _, a, b, n = min(options, key=lambda o: o[0])
+            remaining.remove(n)
+            self.detached.discard(n)
+            self._link(n, a, b)
+            dirty |= self._affected(n)
+
+            # The chain may now reach midpoints left aside by earlier batches
+            if self.detached:
+                x, y = self.midpoint(n)
+                for g in self.mid_grid.within_radius(x, y, self.max_width):
+                    m = self.grid_node[g]
+                    if m in self.detached and m not in remaining:
+                        remaining.append(m)
+
+    def _direction(self, n):
+        """
+        Unit travel direction at node n, deduced from its cone pair
+        (blue cones on the left, yellow cones on the right).
+        """
+        b = self.pair[n]
+        lx = self.blue.xs[b] - self.yellow.xs[n]
+        ly = self.blue.ys[b] - self.yellow.ys[n]
+        norm = math.hypot(lx, ly) or 1.0
+        return ly / norm, -lx / norm
+
+    def _best_insertion(self, n):
+        """
+        Cheapest (cost, prev, next) position for node n in the chain, or None if
+        no chain node within max_width can be linked to n.
+        Two linked nodes must not run in opposite directions (more than 120 degrees
+        apart), which keeps the two sides of a hairpin apart, and the link must
+        point forward along their mean direction.
+        """
+        def d(a, b):
+            return math.dist(self.midpoint(a), self.midpoint(b))
+
+        def forward(a, b):
+            (ax, ay), (bx, by) = self.midpoint(a), self.midpoint(b)
+            (dax, day), (dbx, dby) = self._direction(a), self._direction(b)
+            if dax * dbx + day * dby < -0.5:
+                return False
+            return (dax + dbx) * (bx - ax) + (day + dby) * (by - ay) > 0
+
+        options = []
+        # At an open end of the chain (the usual case while driving)...
+        if not self.closed:
+            if d(self.tail, n) <= self.max_width and forward(self.tail, n):
+                options.append((d(self.tail, n), self.tail, -1))
+            if d(n, self.head) <= self.max_width and forward(n, self.head):
+                options.append((d(n, self.head), -1, self.head))
+
+        # ...or inside an edge around a nearby chain node
+        x, y = self.midpoint(n)
+        for g in self.mid_grid.within_radius(x, y, self.max_width):
+            m = self.grid_node[g]
+            if m == n or not self._in_chain(m) or self.next[m] < 0:
+                continue
+            nxt = self.next[m]
+            if forward(m, n) and forward(n, nxt):
+                options.append((d(m, n) + d(n, nxt) - d(m, nxt), m, nxt))
+
+        if not options:
+            return None
+        return min(options)
+
+    def _link(self, n, a, b):
+        self.prev[n] = a
+        self.next[n] = b
+        if a >= 0:
+            self.next[a] = n
+        else:
+            self.head = n
+        if b >= 0:
+            self.prev[b] = n
+        else:
+            self.tail = n
+
+    def _affected(self, n):
+        """Chain nodes whose outgoing section uses node n as a control point."""
+        nodes = {n}
+        p = self.prev[n]
+        if p >= 0:
+            nodes.add(p)
+            if self.prev[p] >= 0:
+                nodes.add(self.prev[p])
+        if self.next[n] >= 0:
+            nodes.add(self.next[n])
+        return nodes
+
+    def _update_section(self, n):
+        nxt = self.next[n]
+        if nxt < 0:
+            self.sections.pop(n, None)
+            return
+        p1 = self.midpoint(n)
+        p2 = self.midpoint(nxt)
+        p0 = self.midpoint(self.prev[n]) if self.prev[n] >= 0 else p1
+        p3 = self.midpoint(self.next[nxt]) if self.next[nxt] >= 0 else p2
+        n_pts = max(1, math.ceil(math.dist(p1, p2) / self.spacing))
+        self.sections[n] = catmull_rom(p0, p1, p2, p3, n_pts)
@@ -0,0 +1,88 @@
+"""
+Counters and timers of the planners, disabled by default.
+
+A planner built with instrument=True (see core.planners.create_planner) owns an
+Instrumentation, filled by its planning and smoothing stages: build one planner
+per run (or call reset()) and as_dict() exports the run as plain, JSON-serializable
+data. Without it, the planners only pay an `is None` test.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+
+class Instrumentation:
+    """
+    counters : {name: int}, e.g. samples rejected or collision checks.
+    timers : {name: [total seconds, calls]}.
+    events : list of {"event": name, ...} records, e.g. one per planned segment.
+    trace(name, data) is called with each event as it is recorded.
+    """
+
+    def __init__(self, trace=None):
+        self.trace = trace
+        self.counters = {}
+        self.timers = {}
+        self.events = []
+
+    def reset(self):
+        self.counters = {}
+        self.timers = {}
+        self.events = []
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name, seconds, calls=1):
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [seconds, calls]
+        else:
+            timer[0] += seconds
+            timer[1] += calls
+
+    @contextmanager
+    def timer(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def timed(self, name, func):
+        """Returns func wrapped so that each call is added to the timer name."""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add_time(name, time.perf_counter() - t0)
+        return wrapper
+
+    def event(self, name, **data):
+        self.events.append(dict(data, event=name))
+        if self.trace is not None:
+            self.trace(name, data)
+
+    def merge(self, stats):
+        """Adds the counters and timers of stats (an as_dict() export, e.g. from a worker process)."""
+        for name, n in stats["counters"].items():
+            self.count(name, n)
+        for name, timer in stats["timers"].items():
+            self.add_time(name, timer["seconds"], timer["calls"])
+
+    def as_dict(self):
+        return {
+            "counters": dict(self.counters),
+            "timers": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in self.timers.items()},
+            "events": [dict(e) for e in self.events],
+        }
+
+
+_NO_TIMER = nullcontext()
+
+
+def timer(instrumentation, name):
+    """instrumentation.timer(name), or a no-op context manager when instrumentation is None."""
+    return _NO_TIMER if instrumentation is None else instrumentation.timer(name)
@@ -0,0 +1,153 @@
+"""
+Registry of the path planners. Every planner exposes the PathProcessor
+interface: compute_track_centerline(yellow, blue, start_pos),
+compute_from_context(context, on_segment=None), smooth_path(path, spacing=None),
+a stats dict and an instrumentation attribute (None unless built with instrument=True).
+on_segment(points) receives the raw path piece by piece as it is planned;
+on_segment(None) means the pieces received so far must be discarded (a
+FallbackPlanner switching to its fallback planner).
+"""
+import os
+import time
+
+from core.collision import COLLISION_Z
+from core.instrumentation import Instrumentation
+from core.spatial_index import preload_kdtree
+from core.track_context import TrackContext
+
+# Planner used when none is given (CLI flag or PATH_PLANNER environment variable)
+DEFAULT_PLANNER = os.environ.get("PATH_PLANNER", "rrt")
+
+_registry = {}
+
+
+def register_planner(name, description=""):
+    """Decorator registering a planner factory under name."""
+    def decorator(factory):
+        _registry[name] = (factory, description)
+        return factory
+    return decorator
+
+
+def available_planners():
+    """Returns {name: description} for every registered planner."""
+    return {name: description for name, (_, description) in sorted(_registry.items())}
+
+
+def check_planner(name):
+    """Raises ValueError if no planner is registered under name."""
+    if name not in _registry:
+        raise ValueError(f"Unknown planner {name!r}, available: {', '.join(sorted(_registry))}")
+
+
+def create_planner(name, instrument=False, trace=None, **options):
+    """
+    Builds the planner registered under name. Options a planner does not use
+    are ignored, so the same options can be given to every planner.
+    instrument : the planner records counters, timers and events in its
+        instrumentation attribute (core.instrumentation.Instrumentation);
+        trace(event, data) is called with each event (implies instrument).
+    """
+    check_planner(name)
+    factory, _ = _registry[name]
+    if instrument or trace is not None:
+        options["instrumentation"] = Instrumentation(trace)
+    return factory(**options)
+
+
+def run_planners(names, context, spacing=None, smooth=True, **options):
+    """
+    Runs several planners on the same TrackContext, which computes the pairing,
+    ordering and collision structures only once. spacing is passed to smooth_path.
+    With smooth=False the raw path is returned as smoothed path (no spline, SciPy
+    interpolation is not even imported).
+    Returns {name: (planner, raw_path, smoothed_path, seconds)}.
+    """
+    if smooth:
+        # The splines load SciPy anyway: the cones are paired with its KD-tree
+        preload_kdtree()
+    results = {}
+    for name in names:
+        planner = create_planner(name, **options)
+        t0 = time.perf_counter()
+        raw_path = planner.compute_from_context(context)
+        smoothed_path = planner.smooth_path(raw_path, spacing) if raw_path and smooth else raw_path
+        results[name] = (planner, raw_path, smoothed_path, time.perf_counter() - t0)
+    return results
+
+
+class FallbackPlanner:
+    """
+    Runs the primary planner and switches to the fallback planner on the same
+    track if the primary one times out (TimeoutError) or finds no path. The
+    segments already streamed by the primary planner are then withdrawn with
+    on_segment(None) before the fallback planner streams its own.
+    """
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.active = primary  # Planner whose path was returned last
+        self.stats = {}
+        # Both planners share the instrumentation of the primary one
+        self.instrumentation = primary.instrumentation
+
+    def compute_track_centerline(self, yellow_cones, blue_cones, start_pos):
+        if len(yellow_cones) == 0 or len(blue_cones) == 0:
+            print("Error: Not enough cones to compute centerline.")
+            return []
+        return self.compute_from_context(TrackContext(yellow_cones, blue_cones, start_pos))
+
+    def compute_from_context(self, context, on_segment=None):
+        self.active = self.primary
+        reason = "no path"
+        try:
+            path = self.primary.compute_from_context(context, on_segment)
+        except TimeoutError as e:
+            print(f"{e}, using the fallback planner.")
+            path = []
+            reason = "timeout"
+        if not path:
+            if self.instrumentation is not None:
+                self.instrumentation.event("fallback_planner", reason=reason)
+            self.active = self.fallback
+            if on_segment is not None:
+                on_segment(None)
+            path = self.fallback.compute_from_context(context, on_segment)
+        self.stats = dict(self.active.stats, fallback_used=self.active is self.fallback)
+        return path
+
+    def smooth_path(self, path, spacing=None):
+        return self.active.smooth_path(path, spacing)
+
+
+@register_planner("midpoints", "Midpoints of the yellow/blue cone pairs (fast)")
+def _midpoints_planner(instrumentation=None, **_):
+    from core.process_path import PathProcessor
+    return PathProcessor(instrumentation=instrumentation)
+
+
+@register_planner("rrt", "RRT* between consecutive checkpoints")
+def _rrt_planner(workers=1, seed=None, sampling="corridor", max_iter=200, informed=False, time_budget=None,
+                 time_limit=None, instrumentation=None, collision_z=COLLISION_Z, grid_fallback=True, **_):
+    from core.process_path_rrt import PathProcessor
+    return PathProcessor(workers=workers, seed=seed, sampling=sampling, max_iter=max_iter, informed=informed,
+                         time_budget=time_budget, time_limit=time_limit, instrumentation=instrumentation,
+                         collision_z=collision_z, grid_fallback=grid_fallback)
+
+
+@register_planner("mincurv", "Minimum-curvature racing line within the cone corridor")
+def _mincurv_planner(step=1.0, margin=0.75, instrumentation=None, **_):
+    from core.process_path_mincurv import PathProcessor
+    return PathProcessor(step=step, margin=margin, instrumentation=instrumentation)
+
+
+@register_planner("incremental", "Midpoints chained as the cones are detected (perception stream replay)")
+def _incremental_planner(batch_size=4, instrumentation=None, **_):
+    from core.incremental import IncrementalPathProcessor
+    return IncrementalPathProcessor(batch_size=batch_size, instrumentation=instrumentation)
+
+
+@register_planner("rrt_fallback", "RRT*, or midpoints when RRT* exceeds time_limit (default 2 s)")
+def _rrt_fallback_planner(time_limit=2.0, **options):
+    return FallbackPlanner(_rrt_planner(time_limit=time_limit, **options), _midpoints_planner(**options))
@@ -0,0 +1,63 @@
+import queue
+import threading
+import time
+
+from core.planners import create_planner
+from core.spatial_index import preload_kdtree
+from core.velocity_profile import compute_velocity_profile
+
+
+class PlanningWorker(threading.Thread):
+    """
+    Runs the planners on a TrackContext in a background thread, so the window
+    opens right away, and streams the path of the first planner through the
+    `updates` queue as it is planned:
+        ("segment", points)             a newly planned piece of the raw path
+        ("reset",)                      the pieces sent so far are discarded (fallback planner)
+        ("path", smoothed, timestamps)  the final smoothed path and its time stamps
+        ("error", message)              no path could be computed
+    The other planners run afterwards for comparison; results holds
+    {name: (planner, raw_path, smoothed_path, seconds, velocity_profile)}.
+    """
+
+    def __init__(self, planner_names, context, spacing=None, **options):
+        super().__init__(name="planning", daemon=True)
+        self.planner_names = list(planner_names)
+        self.context = context
+        self.spacing = spacing
+        self.options = options
+        self.updates = queue.Queue()
+        self.results = {}
+
+    def run(self):
+        # The paths are smoothed with SciPy splines: the cones are paired with its KD-tree
+        preload_kdtree()
+        for k, name in enumerate(self.planner_names):
+            displayed = k == 0
+            on_segment = self._stream if displayed else None
+            try:
+                planner = create_planner(name, **self.options)
+                t0 = time.perf_counter()
+                raw_path = planner.compute_from_context(self.context, on_segment)
+                smoothed_path = planner.smooth_path(raw_path, self.spacing) if raw_path else []
+                seconds = time.perf_counter() - t0
+            except Exception as e:
+                print(f"{name}: planning failed ({e})")
+                if displayed:
+                    self.updates.put(("error", f"{name}: {e}"))
+                continue
+
+            profile = compute_velocity_profile(smoothed_path) if len(smoothed_path) > 2 else None
+            self.results[name] = (planner, raw_path, smoothed_path, seconds, profile)
+            lap = f", estimated lap time {profile.lap_time:.2f} s" if profile is not None else ""
+            print(f"{name}: {len(raw_path)} raw points, {len(smoothed_path)} smoothed points, "
+                  f"{seconds * 1000:.1f} ms{lap}")
+
+            if displayed:
+                if profile is None:
+                    self.updates.put(("error", "Could not compute a valid path."))
+                else:
+                    self.updates.put(("path", smoothed_path, profile.time.tolist()))
+
+    def _stream(self, points):
+        self.updates.put(("segment", points) if points is not None else ("reset",))
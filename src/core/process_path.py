@@ -1,83 +1,68 @@
+import time
+
 import numpy as np
-from scipy.interpolate import splprep, splev
-import math
+
+from core.instrumentation import timer
+from core.smoothing import evaluate_spline
+from core.track_context import TrackContext
 
 
 class PathProcessor:
-    def __init__(self):
-        pass
+    def __init__(self, instrumentation=None):
+        # Stage durations (s) of the last compute_track_centerline call
+        self.stats = {}
+        # Optional core.instrumentation.Instrumentation receiving the stage timings
+        self.instrumentation = instrumentation
 
     def compute_track_centerline(self, yellow_cones, blue_cones, start_pos):
         """
         Calculates the centerline by taking the midpoint between each yellow cone
         and its nearest blue neighbor, then sorts them to form a coherent loop.
         """
-        if not yellow_cones or not blue_cones:
+        if len(yellow_cones) == 0 or len(blue_cones) == 0:
             print("Error: Not enough cones to compute centerline.")
             return []
+        return self.compute_from_context(TrackContext(yellow_cones, blue_cones, start_pos))
 
-        yellow = np.array(yellow_cones)
-        blue = np.array(blue_cones)
+    def compute_from_context(self, context, on_segment=None):
+        """
+        Same as compute_track_centerline, reusing the pairing and ordering already
+        computed in context (a TrackContext shared between planners).
+        on_segment(points) receives the path once computed (single segment).
+        """
+        self.stats = {}
 
         # 1. Find midpoints (Yellow <-> Nearest Blue)
-        midpoints = []
-        for y_pt in yellow:
-            # Euclidean distance to all blue cones
-            dists = np.linalg.norm(blue - y_pt, axis=1)
-            nearest_blue_idx = np.argmin(dists)
-            b_pt = blue[nearest_blue_idx]
-
-            # Calculate midpoint
-            mid = (y_pt + b_pt) / 2
-            midpoints.append(tuple(mid))
-
-        midpoints = np.array(midpoints)
+        t0 = time.perf_counter()
+        midpoints = context.midpoints
+        self.stats["pairing"] = time.perf_counter() - t0
         if len(midpoints) == 0:
             return []
 
         # 2. Sort points (Greedy Nearest Neighbor) to form a path
         # Start with the point closest to the car's start position
-        start_arr = np.array(start_pos)
-        dists_to_start = np.linalg.norm(midpoints - start_arr, axis=1)
-        current_idx = np.argmin(dists_to_start)
-
-        sorted_indices = [current_idx]
-        visited = set([current_idx])
-        n_points = len(midpoints)
-
-        while len(sorted_indices) < n_points:
-            current_pos = midpoints[current_idx]
-
-            # Distances to all points
-            dists = np.linalg.norm(midpoints - current_pos, axis=1)
-
-            # Mask visited points with infinity so they aren't picked
-            dists[list(visited)] = np.inf
-
-            next_idx = np.argmin(dists)
-            min_dist = dists[next_idx]
-
-            # If the nearest unvisited point is too far (e.g., > 20m),
-            # it might be a jump across the track. For now, we continue.
-            if min_dist == np.inf:
-                break
-
-            sorted_indices.append(next_idx)
-            visited.add(next_idx)
-            current_idx = next_idx
+        t0 = time.perf_counter()
+        sorted_indices = context.order
+        self.stats["ordering"] = time.perf_counter() - t0
 
         # Reconstruct ordered path
         ordered_path = [tuple(midpoints[i]) for i in sorted_indices]
 
-        # Close the loop
-        if ordered_path:
+        # Close the loop (open tracks, e.g. acceleration runs, are left open)
+        if ordered_path and context.closed:
             ordered_path.append(ordered_path[0])
 
+        if self.instrumentation is not None:
+            self.instrumentation.event("compute", planner="midpoints", **self.stats)
+        if on_segment is not None and ordered_path:
+            on_segment(ordered_path)
         return ordered_path
 
-    def smooth_path(self, path):
+    def smooth_path(self, path, spacing=None):
         """
         Smooths the path using a Cubic B-Spline.
+        With spacing (m), the spline is resampled at a fixed arc-length spacing
+        instead of len(path) * 10 points evenly spaced in spline parameter.
         """
         if len(path) < 3:
             return path
@@ -93,21 +78,25 @@ class PathProcessor:
         if len(clean_path) < 4:
             return clean_path.tolist()
 
+        # Imported on first use: the raw centerline does not need SciPy
+        from scipy.interpolate import splprep
         try:
             x = clean_path[:, 0]
             y = clean_path[:, 1]
 
-            # Spline parameters: s=0.5 (match your working script), k=3, per=True (closed loop)
-            tck, u = splprep([x, y], s=0.5, k=3, per=True)
-
-            # Generate high density points for smooth animation
-            u_new = np.linspace(0, 1, num=len(clean_path) * 10)
-            x_new, y_new = splev(u_new, tck)
+            with timer(self.instrumentation, "smooth_spline"):
+                # Spline parameters: s=0.5 (match your working script), k=3, per=True (closed loop)
+                tck, u = splprep([x, y], s=0.5, k=3, per=True)
 
-            return list(zip(x_new, y_new))
+                # Generate high density points for smooth animation
+                smoothed = evaluate_spline(tck, num=len(clean_path) * 10, spacing=spacing)
         except Exception as e:
             print(f"Spline smoothing failed ({e}). Using raw path.")
-            return clean_path.tolist()
+            smoothed = clean_path.tolist()
+        if self.instrumentation is not None:
+            self.instrumentation.event("smooth", raw_points=len(path), filtered_points=len(clean_path),
+                                       points=len(smoothed))
+        return smoothed
 
 
 # Compatibility wrapper
@@ -116,6 +105,6 @@ def compute_centerline(yellow, blue, start):
     return p.compute_track_centerline(yellow, blue, start)
 
 
-def smooth_path(path):
+def smooth_path(path, spacing=None):
     p = PathProcessor()
-    return p.smooth_path(path)
\ No newline at end of file
+    return p.smooth_path(path, spacing)
\ No newline at end of file
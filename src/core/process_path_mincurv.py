@@ -0,0 +1,203 @@
+import math
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.interpolate import splprep
+from scipy.sparse.linalg import spsolve, splu
+
+from core.instrumentation import timer
+from core.smoothing import evaluate_spline
+from core.track_context import TrackContext
+
+
+def resample_boundaries(left, right, step, closed=True):
+    """
+    Resamples the loop of cone pairs (left[i], right[i]) every `step` metres of
+    centerline, interpolating both boundaries along it.
+    Closed loop: returns (left, right) without repeating the first pair at the end.
+    Open track (closed=False): the first and last pairs are kept as the ends.
+    """
+    if closed:
+        left = np.vstack((left, left[:1]))
+        right = np.vstack((right, right[:1]))
+    center = (left + right) / 2
+    s = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(center, axis=0).T))))
+    n = max(3, math.ceil(s[-1] / step))
+    s_new = np.linspace(0.0, s[-1], n if closed else n + 1, endpoint=not closed)
+
+    def interp(points):
+        return np.column_stack((np.interp(s_new, s, points[:, 0]), np.interp(s_new, s, points[:, 1])))
+
+    return interp(left), interp(right)
+
+
+def second_difference_matrix(n, closed=True):
+    """
+    Sparse second difference: (D p)_i = p[i-1] - 2 p[i] + p[i+1].
+    Cyclic for a closed loop, only the n - 2 interior rows for an open track.
+    """
+    main = np.full(n, -2.0)
+    off = np.ones(n - 1)
+    d = sparse.diags([off, main, off], [-1, 0, 1], shape=(n, n), format="lil")
+    if not closed:
+        return d[1:-1].tocsr()
+    d[0, n - 1] = 1.0
+    d[n - 1, 0] = 1.0
+    return d.tocsr()
+
+
+def min_curvature_offsets(center, normals, half_widths, margin, tol=1e-5, max_iter=5000, closed=True):
+    """
+    Lateral offsets alpha minimizing the squared second differences of
+    center + alpha * normals (discrete curvature of a uniformly sampled loop,
+    or of an open line with closed=False), with |alpha_i| <= half_widths[i] - margin.
+    The quadratic program 1/2 a^T H a + g^T a (H sparse, 5 diagonals plus the
+    loop corners) is solved by ADMM: H + rho I is factorized once, each
+    iteration is one sparse triangular solve and a clip to the bounds.
+    The active set found is then polished with one exact solve of the free offsets.
+    Returns (alpha, number of iterations, converged); converged is False when
+    max_iter was reached before the tolerance (alpha is then only approximate).
+    """
+    n = len(center)
+    d = second_difference_matrix(n, closed)
+    a = sparse.vstack((d @ sparse.diags(normals[:, 0]), d @ sparse.diags(normals[:, 1]))).tocsr()
+    b = -np.concatenate((d @ center[:, 0], d @ center[:, 1]))
+    h = (a.T @ a).tocsc()
+    g = -(a.T @ b)
+
+    bound = np.maximum(half_widths - margin, 0.0)
+    rho = 5e-3 * max(h.diagonal().mean(), 1e-12)
+    lu = splu((h + rho * sparse.identity(n)).tocsc())
+
+    z = np.zeros(n)
+    u = np.zeros(n)
+    for it in range(1, max_iter + 1):
+        x = lu.solve(rho * (z - u) - g)
+        z_new = np.clip(x + u, -bound, bound)
+        u += x - z_new
+        converged = bool(np.abs(x - z_new).max() < tol and np.abs(z_new - z).max() < tol)
+        z = z_new
+        if converged:
+            break
+
+    return _polish(h, g, z, bound), it, converged
+
+
+def _polish(h, g, alpha, bound):
+    """
+    Exact solution for the active set of alpha (offsets at a bound stay there),
+    kept only if it stays inside the bounds and does not cost more.
+    """
+    fixed = np.abs(alpha) >= bound - 1e-6
+    free = ~fixed
+    if not free.any():
+        return alpha
+    polished = alpha.copy()
+    polished[fixed] = np.sign(alpha[fixed]) * bound[fixed]
+    rhs = -g[free] - h[free][:, fixed] @ polished[fixed]
+    try:
+        polished[free] = spsolve(h[free][:, free].tocsc(), rhs)
+    except RuntimeError:
+        return alpha  # Singular system (e.g. free straight stretch): keep the ADMM result
+
+    def cost(x):
+        return 0.5 * x @ (h @ x) + g @ x
+
+    if np.all(np.abs(polished) <= bound + 1e-9) and cost(polished) <= cost(alpha):
+        return polished
+    return alpha
+
+
+class PathProcessor:
+    """
+    Minimum-curvature racing line: the centerline is shifted laterally, within
+    the track width given by the yellow/blue cone pairs, so that the sum of the
+    squared discrete curvatures is minimal.
+    """
+
+    def __init__(self, step=1.0, margin=0.75, instrumentation=None):
+        self.step = step  # Centerline resampling step (m)
+        self.margin = margin  # Clearance kept from the cones (m)
+        # Stage durations (s) of the last compute_track_centerline call
+        self.stats = {}
+        # Optional core.instrumentation.Instrumentation receiving the stage timings
+        self.instrumentation = instrumentation
+
+    def compute_track_centerline(self, yellow_cones, blue_cones, start_pos):
+        """
+        Computes the minimum-curvature line of the track (first point repeated at the
+        end if the track is a closed loop).
+        """
+        if len(yellow_cones) == 0 or len(blue_cones) == 0:
+            print("Error: Not enough cones to compute the racing line.")
+            return []
+        return self.compute_from_context(TrackContext(yellow_cones, blue_cones, start_pos))
+
+    def compute_from_context(self, context, on_segment=None):
+        """
+        Same as compute_track_centerline, reusing the pairing and ordering already
+        computed in context (a TrackContext shared between planners).
+        on_segment(points) receives the path once computed (single segment).
+        """
+        self.stats = {}
+
+        t0 = time.perf_counter()
+        nearest_blue = context.nearest_blue
+        self.stats["pairing"] = time.perf_counter() - t0
+        if len(nearest_blue) < 3:
+            return []
+
+        t0 = time.perf_counter()
+        order = context.order
+        self.stats["ordering"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        # Blue cones on the left, yellow cones on the right, in driving order
+        closed = context.closed
+        left, right = resample_boundaries(context.blue[nearest_blue[order]], context.yellow[order], self.step, closed)
+        center = (left + right) / 2
+        width = np.hypot(*(left - right).T)
+        normals = (left - right) / np.maximum(width, 1e-9)[:, None]
+
+        alpha, n_iter, converged = min_curvature_offsets(center, normals, width / 2, self.margin, closed=closed)
+        line = center + alpha[:, None] * normals
+        self.stats["planning"] = time.perf_counter() - t0
+        self.stats["solver_iterations"] = n_iter
+        self.stats["converged"] = converged
+        if not converged:
+            print(f"Warning: min-curvature solver stopped after {n_iter} iterations without converging.")
+        if self.instrumentation is not None:
+            self.instrumentation.event("solver", planner="mincurv", iterations=n_iter, converged=converged)
+            self.instrumentation.event("compute", planner="mincurv", **self.stats)
+
+        path = [tuple(p) for p in line.tolist()]
+        # Open tracks (e.g. acceleration runs) are left open, as by the midpoints planner
+        if closed:
+            path.append(path[0])
+        if on_segment is not None:
+            on_segment(path)
+        return path
+
+    def smooth_path(self, path, spacing=None):
+        """
+        Interpolates the (already smooth) line with a cubic spline through its points,
+        periodic if the line is closed (last point repeating the first one).
+        With spacing (m), the spline is resampled at a fixed arc-length spacing.
+        """
+        if len(path) < 4:
+            return path
+
+        pts = np.asarray(path, dtype=float)
+        # per=True ignores the last point, which repeats the first one on a closed loop
+        closed = np.allclose(pts[0], pts[-1])
+        try:
+            with timer(self.instrumentation, "smooth_spline"):
+                tck, _ = splprep([pts[:, 0], pts[:, 1]], s=0, k=3, per=closed)
+                smoothed = evaluate_spline(tck, num=len(path) * 5, spacing=spacing)
+        except Exception as e:
+            print(f"Spline interpolation failed ({e}). Using raw line.")
+            smoothed = [tuple(p) for p in pts.tolist()]
+        if self.instrumentation is not None:
+            self.instrumentation.event("smooth", raw_points=len(path), points=len(smoothed))
+        return smoothed
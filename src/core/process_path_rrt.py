@@ -1,330 +1,596 @@
 import numpy as np
 import math
-import random
-from scipy.interpolate import splprep, splev
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+from core.collision import COLLISION_Z, as_collision_checker
+from core.grid_planner import grid_path
+from core.instrumentation import Instrumentation, timer
+from core.rrt_tree import RRTTree
+from core.sampling import BoxSampler, CorridorSampler, EllipseSampler
+from core.smoothing import evaluate_spline, filter_min_distance, laplacian_smooth
+from core.spatial_index import preload_kdtree
+from core.track_context import TrackContext
 
-class RRTNode:
-    """Nœud pour l'arbre RRT"""
-
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.path_x = []
-        self.path_y = []
-        self.parent = None
-        self.cost = 0.0
+# Le test de collision charge de toute façon scipy.spatial : l'appariement des cônes utilise aussi son KD-tree
+preload_kdtree()
 
 
 class RRTStar:
     """
     Planificateur de chemin RRT* (Rapidly-exploring Random Tree Star).
     Cherche le chemin optimal localement en évitant les obstacles (cônes).
+    L'arbre est stocké dans des tableaux NumPy (RRTTree) et les arêtes sont
+    vérifiées analytiquement comme des segments.
+
+    En mode informed (Informed RRT*), la recherche continue après la première
+    solution en échantillonnant dans l'ellipse définie par le meilleur coût,
+    jusqu'à épuisement du budget (max_iter itérations et/ou time_budget secondes).
+
+    instrumentation (core.instrumentation.Instrumentation) : si fournie, compte les
+    échantillons rejetés et les tests de collision, et chronomètre l'échantillonnage,
+    la recherche du plus proche, find_near_nodes, choose_parent et rewire.
     """
 
     def __init__(self, start, goal, obstacle_list, rand_area, expand_dis=2.0, path_resolution=0.5, goal_sample_rate=5,
-                 max_iter=100):
-        self.start = RRTNode(start[0], start[1])
-        self.goal = RRTNode(goal[0], goal[1])
-        self.min_rand = rand_area[0]
-        self.max_rand = rand_area[1]
+                 max_iter=100, rng=None, sample_batch_size=4096, sampler=None, informed=False, time_budget=None,
+                 instrumentation=None):
+        self.start = (float(start[0]), float(start[1]))
+        self.goal = (float(goal[0]), float(goal[1]))
+        # rand_area : [min, max] (mêmes bornes sur les deux axes) ou [(min_x, max_x), (min_y, max_y)].
+        # sampler (BoxSampler, CorridorSampler...) remplace rand_area s'il est fourni.
+        self.rand_area = rand_area
+        self.sampler = sampler if sampler is not None else BoxSampler.from_rand_area(rand_area)
         self.expand_dis = expand_dis
+        # Extension minimale : un échantillon plus proche de l'arbre que cela est ignoré
         self.path_resolution = path_resolution
         self.goal_sample_rate = goal_sample_rate
+        # max_iter=None : seul time_budget limite la recherche
+        if max_iter is None and time_budget is None:
+            raise ValueError("max_iter et time_budget ne peuvent pas être tous deux None")
         self.max_iter = max_iter
+        self.time_budget = time_budget
+        self.informed = informed
         self.obstacle_list = obstacle_list
-        self.node_list = []
+        # obstacle_list peut être une liste (x, y, rayon) ou un ConeCollisionChecker partagé
+        self.collision_checker = as_collision_checker(obstacle_list)
+        # rng : numpy.random.Generator, graine entière ou None (aléatoire)
+        self.rng = np.random.default_rng(rng)
+        self.sample_batch_size = sample_batch_size
+        self._samples = []
+        self._sample_pos = 0
+        self._informed_sampler = None
+        self.tree = None
+        # Résultats du dernier appel à plan()
+        self.best_cost = float("inf")
+        self.n_iter = 0
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            # Méthodes chronométrées sur l'instance seulement : aucun coût sans instrumentation
+            for name, label in (("get_random_node", "sample"), ("get_nearest_node_index", "nearest"),
+                                ("check_segment", "check_segment"), ("find_near_nodes", "find_near_nodes"),
+                                ("choose_parent", "choose_parent"), ("rewire", "rewire")):
+                setattr(self, name, instrumentation.timed(label, getattr(self, name)))
 
     def plan(self):
-        self.node_list = [self.start]
-
-        for i in range(self.max_iter):
-            rnd_node = self.get_random_node()
-            nearest_ind = self.get_nearest_node_index(self.node_list, rnd_node)
-            nearest_node = self.node_list[nearest_ind]
-
-            new_node = self.steer(nearest_node, rnd_node, self.expand_dis)
-
-            if self.check_collision(new_node, self.obstacle_list):
-                near_inds = self.find_near_nodes(new_node)
-                new_node = self.choose_parent(new_node, near_inds)
-                if new_node:
-                    self.node_list.append(new_node)
-                    self.rewire(new_node, near_inds)
-
-            if self.calc_dist_to_goal(self.node_list[-1].x, self.node_list[-1].y) <= self.expand_dis:
-                final_node = self.steer(self.node_list[-1], self.goal, self.expand_dis)
-                if self.check_collision(final_node, self.obstacle_list):
-                    return self.generate_final_course(len(self.node_list) - 1)
-
-        return None  # Pas de chemin trouvé dans la limite d'itérations
-
-    def choose_parent(self, new_node, near_inds):
-        if not near_inds:
-            return None
-
-        costs = []
-        for i in near_inds:
-            near_node = self.node_list[i]
-            t_node = self.steer(near_node, new_node, math.hypot(new_node.x - near_node.x, new_node.y - near_node.y))
-            if t_node and self.check_collision(t_node, self.obstacle_list):
-                costs.append(near_node.cost + math.hypot(new_node.x - near_node.x, new_node.y - near_node.y))
-            else:
-                costs.append(float("inf"))
-
-        min_cost = min(costs)
-        if min_cost == float("inf"):
-            return None
-
-        min_ind = near_inds[costs.index(min_cost)]
-        new_node = self.steer(self.node_list[min_ind], new_node, math.hypot(new_node.x - self.node_list[min_ind].x,
-                                                                            new_node.y - self.node_list[min_ind].y))
-        new_node.parent = self.node_list[min_ind]
-        new_node.cost = min_cost
-
-        return new_node
-
-    def rewire(self, new_node, near_inds):
-        for i in near_inds:
-            near_node = self.node_list[i]
-            edge_node = self.steer(new_node, near_node, math.hypot(near_node.x - new_node.x, near_node.y - new_node.y))
-            if not edge_node:
+        capacity = self.max_iter + 1 if self.max_iter is not None else 256
+        self.tree = RRTTree(cell_size=self.expand_dis, capacity=capacity)
+        self.tree.add(self.start[0], self.start[1])
+        self._samples = []
+        self._sample_pos = 0
+        self._informed_sampler = None
+        self.best_cost = float("inf")
+        goal_inds = []
+        inst = self.instrumentation
+
+        deadline = None
+        if self.time_budget is not None:
+            deadline = time.perf_counter() + self.time_budget
+
+        # Aucun chemin ne peut être plus court que la ligne droite : arrêt anticipé
+        c_min = self.calc_dist_to_goal(*self.start)
+
+        i = 0
+        while self.max_iter is None or i < self.max_iter:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if self.best_cost <= c_min * (1.0 + 1e-3):
+                break
+            i += 1
+            self.n_iter = i
+
+            rnd_x, rnd_y = self.get_random_node()
+            nearest_ind = self.get_nearest_node_index(rnd_x, rnd_y)
+
+            new_x, new_y = self.steer(nearest_ind, rnd_x, rnd_y, self.expand_dis)
+
+            added = False
+            if new_x is not None and self.check_segment(nearest_ind, new_x, new_y):
+                near_inds = self.find_near_nodes(new_x, new_y)
+                parent_ind, cost = self.choose_parent(new_x, new_y, near_inds)
+                if parent_ind is not None:
+                    new_ind = self.tree.add(new_x, new_y, parent_ind, cost)
+                    self.rewire(new_ind, near_inds)
+                    added = True
+            if inst is not None:
+                inst.count("iterations")
+                # Rejeté : échantillon trop proche de l'arbre, arête en collision ou aucun parent possible
+                inst.count("nodes_added" if added else "samples_rejected")
+
+            # Le dernier nœud n'a pas changé : inutile de retester la connexion au but
+            if not added and i > 1:
                 continue
-            edge_node.cost = new_node.cost + math.hypot(near_node.x - new_node.x, near_node.y - new_node.y)
-
-            if near_node.cost > edge_node.cost:
-                if self.check_collision(edge_node, self.obstacle_list):
-                    self.node_list[i] = edge_node
-                    self.node_list[i].parent = new_node
 
-    def find_near_nodes(self, new_node):
-        n_node = len(self.node_list) + 1
+            last_ind = len(self.tree) - 1
+            dist_to_goal = self.calc_dist_to_goal(self.tree.x[last_ind], self.tree.y[last_ind])
+            if dist_to_goal <= self.expand_dis:
+                if inst is not None:
+                    inst.count("goal_checks")
+                if self.check_segment(last_ind, self.goal[0], self.goal[1]):
+                    if not self.informed:
+                        self.best_cost = float(self.tree.cost[last_ind]) + dist_to_goal
+                        return self.generate_final_course(last_ind)
+                    goal_inds.append(last_ind)
+                    self._update_informed_set(float(self.tree.cost[last_ind]) + dist_to_goal)
+
+        if goal_inds:
+            return self.generate_final_course(self._best_goal_index(goal_inds))
+        return None  # Pas de chemin trouvé dans le budget
+
+    def _update_informed_set(self, cost):
+        if cost >= self.best_cost:
+            return
+        self.best_cost = cost
+        # Nouvelle ellipse : les échantillons déjà tirés ne sont plus valides
+        self._informed_sampler = EllipseSampler(self.start, self.goal, cost)
+        self._samples = []
+        self._sample_pos = 0
+
+    def _best_goal_index(self, goal_inds):
+        """
+        Les coûts stockés ne sont pas propagés aux descendants lors du rewire :
+        on recalcule le coût réel de chaque candidat en remontant l'arbre.
+        """
+        best_ind, best_cost = None, float("inf")
+        for ind in goal_inds:
+            cost = self.tree.path_length_to_root(ind) + self.calc_dist_to_goal(self.tree.x[ind], self.tree.y[ind])
+            if cost < best_cost:
+                best_ind, best_cost = ind, cost
+        self.best_cost = float(best_cost)
+        return best_ind
+
+    def choose_parent(self, new_x, new_y, near_inds):
+        """
+        Retourne (indice du parent, coût) minimisant le coût d'arrivée, ou (None, inf).
+        """
+        if len(near_inds) == 0:
+            return None, float("inf")
+
+        tree = self.tree
+        near_x = tree.x[near_inds]
+        near_y = tree.y[near_inds]
+        costs = tree.cost[near_inds] + np.hypot(new_x - near_x, new_y - near_y)
+        free = self.collision_checker.segments_free(near_x, near_y, new_x, new_y)
+        costs[~free] = np.inf
+        if self.instrumentation is not None:
+            self.instrumentation.count("collision_checks", len(near_inds))
+
+        # argmin garde le premier indice en cas d'égalité, comme costs.index(min(costs))
+        best = int(np.argmin(costs))
+        if costs[best] == np.inf:
+            return None, float("inf")
+        return int(near_inds[best]), float(costs[best])
+
+    def rewire(self, new_ind, near_inds):
+        if len(near_inds) == 0:
+            return
+        tree = self.tree
+        new_x, new_y = tree.x[new_ind], tree.y[new_ind]
+        near_x = tree.x[near_inds]
+        near_y = tree.y[near_inds]
+        new_costs = tree.cost[new_ind] + np.hypot(near_x - new_x, near_y - new_y)
+
+        # Seules les arêtes qui améliorent le coût sont vérifiées
+        better = tree.cost[near_inds] > new_costs
+        if not np.any(better):
+            return
+        cand = near_inds[better]
+        free = self.collision_checker.segments_free(new_x, new_y, near_x[better], near_y[better])
+        cand = cand[free]
+        if self.instrumentation is not None:
+            self.instrumentation.count("collision_checks", len(free))
+            self.instrumentation.count("rewired", len(cand))
+        tree.parent[cand] = new_ind
+        tree.cost[cand] = new_costs[better][free]
+
+    def find_near_nodes(self, new_x, new_y):
+        n_node = len(self.tree) + 1
         r = 50.0 * math.sqrt((math.log(n_node) / n_node))
-        d_list = [(node.x - new_node.x) ** 2 + (node.y - new_node.y) ** 2 for node in self.node_list]
-        near_inds = [d_list.index(i) for i in d_list if i <= r ** 2]
-        return near_inds
+        return self.tree.within_radius(new_x, new_y, r)
 
     def get_random_node(self):
-        if random.randint(0, 100) > self.goal_sample_rate:
-            rnd = RRTNode(random.uniform(self.min_rand, self.max_rand),
-                          random.uniform(self.min_rand, self.max_rand))
-        else:
-            rnd = RRTNode(self.goal.x, self.goal.y)
-        return rnd
-
-    def get_nearest_node_index(self, node_list, rnd_node):
-        dlist = [(node.x - rnd_node.x) ** 2 + (node.y - rnd_node.y) ** 2 for node in node_list]
-        minind = dlist.index(min(dlist))
-        return minind
-
-    def steer(self, from_node, to_node, extend_length=float("inf")):
-        new_node = RRTNode(from_node.x, from_node.y)
-        d, theta = self.calc_distance_and_angle(new_node, to_node)
-
-        new_node.path_x = [new_node.x]
-        new_node.path_y = [new_node.y]
-
-        if extend_length > d:
-            extend_length = d
-
-        n_expand = math.floor(extend_length / self.path_resolution)
-
-        for _ in range(n_expand):
-            new_node.x += self.path_resolution * math.cos(theta)
-            new_node.y += self.path_resolution * math.sin(theta)
-            new_node.path_x.append(new_node.x)
-            new_node.path_y.append(new_node.y)
-
-        d, _ = self.calc_distance_and_angle(new_node, to_node)
-        if d <= self.path_resolution:
-            new_node.path_x.append(to_node.x)
-            new_node.path_y.append(to_node.y)
-
-        new_node.parent = from_node
-        return new_node
-
-    def check_collision(self, node, obstacle_list):
-        if node is None:
-            return False
-
-        # On vérifie pour chaque point du segment généré
-        for ix, iy in zip(node.path_x, node.path_y):
-            for (ox, oy, size) in obstacle_list:
-                dx = ox - ix
-                dy = oy - iy
-                d = dx * dx + dy * dy
-                # Collision si distance < (rayon cone + marge sécurité)
-                if d <= size ** 2:
-                    return False  # Collision detectée
-        return True  # Pas de collision (Safe)
+        if self._sample_pos >= len(self._samples):
+            n = self.sample_batch_size
+            if self.max_iter is not None:
+                n = min(n, self.max_iter)
+            self._samples = self.sample_batch(n)
+            self._sample_pos = 0
+        sample = self._samples[self._sample_pos]
+        self._sample_pos += 1
+        return sample
+
+    def sample_batch(self, n):
+        """
+        Tire n échantillons d'un coup dans la zone du sampler,
+        remplacés par le but avec une probabilité goal_sample_rate %.
+        Une fois une solution trouvée en mode informed, on tire dans l'ellipse.
+        """
+        n = max(1, n)
+        if self._informed_sampler is not None:
+            xs, ys = self._informed_sampler.sample(self.rng, n)
+            return list(zip(xs.tolist(), ys.tolist()))
+        xs, ys = self.sampler.sample(self.rng, n)
+        use_goal = self.rng.integers(0, 101, n) <= self.goal_sample_rate
+        xs[use_goal] = self.goal[0]
+        ys[use_goal] = self.goal[1]
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def get_nearest_node_index(self, x, y):
+        return self.tree.nearest(x, y)
+
+    def steer(self, from_ind, to_x, to_y, extend_length=float("inf")):
+        """
+        Avance depuis le nœud from_ind vers (to_x, to_y) d'au plus extend_length.
+        Retourne (None, None) si le déplacement est inférieur à path_resolution.
+        """
+        from_x, from_y = self.tree.x[from_ind], self.tree.y[from_ind]
+        d, theta = self.calc_distance_and_angle(from_x, from_y, to_x, to_y)
+        if d < self.path_resolution:
+            return None, None
+        if d <= extend_length:
+            return float(to_x), float(to_y)
+        return (float(from_x + extend_length * math.cos(theta)),
+                float(from_y + extend_length * math.sin(theta)))
+
+    def check_segment(self, from_ind, to_x, to_y):
+        if self.instrumentation is not None:
+            self.instrumentation.count("collision_checks")
+        return self.collision_checker.segment_free(self.tree.x[from_ind], self.tree.y[from_ind], to_x, to_y)
 
     def generate_final_course(self, goal_ind):
-        path = [[self.goal.x, self.goal.y]]
-        node = self.node_list[goal_ind]
-        while node.parent is not None:
-            path.append([node.x, node.y])
-            node = node.parent
-        path.append([node.x, node.y])
+        path = [[self.goal[0], self.goal[1]]] + self.tree.path_to_root(goal_ind)
         return path[::-1]  # Retourner le chemin inversé (Start -> Goal)
 
-    def calc_distance_and_angle(self, from_node, to_node):
-        dx = to_node.x - from_node.x
-        dy = to_node.y - from_node.y
+    def calc_distance_and_angle(self, from_x, from_y, to_x, to_y):
+        dx = to_x - from_x
+        dy = to_y - from_y
         d = math.hypot(dx, dy)
         theta = math.atan2(dy, dx)
         return d, theta
 
     def calc_dist_to_goal(self, x, y):
-        dx = x - self.goal.x
-        dy = y - self.goal.y
+        dx = x - self.goal[0]
+        dy = y - self.goal[1]
         return math.hypot(dx, dy)
 
 
+def plan_segment(start, goal, collision_checker, sampler, rng=None, **rrt_options):
+    """
+    Planifie un segment checkpoint -> checkpoint avec RRT*.
+    sampler définit la zone d'échantillonnage (voir core.sampling).
+    rng (Generator, SeedSequence ou graine) rend le segment reproductible.
+    rrt_options remplace les paramètres par défaut de RRTStar (max_iter, informed...).
+    """
+    # Paramètres RRT ajustés pour être moins chaotiques
+    params = dict(max_iter=200,  # Un peu plus d'itérations
+                  expand_dis=3.0,  # Pas plus grands
+                  path_resolution=1.0)  # Résolution plus grossière pour moins de bruit
+    params.update(rrt_options)
+    rrt = RRTStar(start=start, goal=goal,
+                  obstacle_list=collision_checker,
+                  rand_area=None,
+                  sampler=sampler,
+                  rng=rng,
+                  **params)
+    return rrt.plan()
+
+
+# État des processus du pool : la structure de collision n'est envoyée qu'une fois par worker
+_worker_state = {}
+
+
+def _init_segment_worker(collision_checker, rrt_options, instrument, grid_fallback):
+    _worker_state["collision_checker"] = collision_checker
+    _worker_state["rrt_options"] = rrt_options
+    _worker_state["instrument"] = instrument
+    _worker_state["grid_fallback"] = grid_fallback
+
+
+def _plan_segment_in_worker(args):
+    start, goal, sampler, rng = args
+    return _plan_segment_with_stats(start, goal, _worker_state["collision_checker"], sampler, rng,
+                                    _worker_state["rrt_options"], _worker_state["instrument"],
+                                    _worker_state["grid_fallback"])
+
+
+def _plan_segment_with_stats(start, goal, collision_checker, sampler, rng, rrt_options, instrument,
+                             grid_fallback=True):
+    """
+    Retourne (segment, stats, grid) : stats est l'export (as_dict) d'une Instrumentation
+    propre au segment, ou None sans instrumentation. Le segment peut venir d'un
+    autre processus, ses compteurs sont donc fusionnés par l'appelant.
+    Si RRT* échoue et grid_fallback est vrai, le segment est cherché par A* sur une
+    grille locale (grid_path) ; grid indique alors qu'il en vient.
+    Un départ ou un but dans la marge d'un cône ne peut être relié par RRT* : le
+    segment est directement confié à grid_path, qui part (arrive) des cellules
+    libres les plus proches de ces extrémités.
+    """
+    inst = Instrumentation() if instrument else None
+    grid = False
+    with timer(inst, "segment"):
+        segment = None
+        if collision_checker.points_free((start[0], goal[0]), (start[1], goal[1])):
+            segment = plan_segment(start, goal, collision_checker, sampler, rng, instrumentation=inst, **rrt_options)
+        elif inst is not None:
+            inst.count("blocked_endpoints")
+        if segment is None and grid_fallback:
+            with timer(inst, "grid_path"):
+                segment = grid_path(start, goal, collision_checker)
+            grid = segment is not None
+    return segment, None if inst is None else inst.as_dict(), grid
+
+
+# Marge de sécurité augmentée pour éviter de raser les cônes
+CONE_RADIUS = 1.2
+# Marge hors incertitude de position : avec un écart-type de 0.1 m et collision_z = 3,
+# on retrouve CONE_RADIUS ; les cônes mieux localisés laissent plus de place
+CONE_BASE_RADIUS = 0.9
+
+
 class PathProcessor:
-    def __init__(self):
-        pass
+    SAMPLING_MODES = ("corridor", "local", "box")
+
+    def __init__(self, workers=1, seed=None, sampling="corridor", max_iter=200, informed=False, time_budget=None,
+                 time_limit=None, instrumentation=None, collision_z=COLLISION_Z, grid_fallback=True):
+        """
+        workers : nombre de processus pour planifier les segments (None = tous les cœurs).
+        Avec workers > 1, tous les segments sont planifiés en parallèle, chacun partant
+        de son checkpoint.
+        seed (entier, SeedSequence ou numpy.random.Generator) : chaque segment reçoit
+        son propre générateur dérivé de seed, le chemin est donc identique d'une
+        exécution à l'autre et quel que soit workers.
+        sampling : zone d'échantillonnage de chaque segment
+            "corridor" : couloir entre cônes jaunes et bleus autour du segment,
+            "local" : boîte autour du départ et du but du segment,
+            "box" : boîte englobant tout le circuit.
+        max_iter / time_budget : budget par segment (itérations / secondes).
+        informed : Informed RRT*, le segment est amélioré jusqu'à épuisement du
+            budget et le meilleur chemin trouvé est retourné.
+        time_limit : durée maximale (s) de la planification de tout le circuit,
+            TimeoutError est levée au-delà.
+        collision_z : la marge de chaque cône dépend de l'incertitude de sa position :
+            CONE_BASE_RADIUS + collision_z écarts-types (voir chance_constrained_radii,
+            3 par défaut). Sans covariances des cônes (TrackContext.from_track ou cônes
+            à 5 colonnes) ou avec collision_z=None, tous les cônes ont CONE_RADIUS.
+        grid_fallback : un segment que RRT* n'a pas relié est cherché par A* sur une
+            grille locale (core.grid_planner) avant le repli en ligne droite.
+        instrumentation (core.instrumentation.Instrumentation) : reçoit les compteurs
+            de RRT* de chaque segment, un événement "segment" par segment (indice,
+            itérations, durée, fallback en ligne droite) et les durées du lissage.
+        """
+        if sampling not in self.SAMPLING_MODES:
+            raise ValueError(f"Mode d'échantillonnage inconnu : {sampling!r}")
+        self.workers = os.cpu_count() if workers is None else workers
+        self.seed = seed
+        self.sampling = sampling
+        self.corridor_window = 2  # Nombre de quads de couloir de part et d'autre du segment
+        self.local_margin = 5.0  # Marge (m) de la boîte locale
+        self.rrt_options = dict(max_iter=max_iter, informed=informed, time_budget=time_budget)
+        self.time_limit = time_limit
+        self.collision_z = collision_z
+        self.grid_fallback = grid_fallback
+        # Durées (s) des étapes et nombre de segments en ligne droite du dernier calcul
+        self.stats = {}
+        self._grid_segments = 0  # Segments reliés par grid_path lors du dernier calcul
+        self.instrumentation = instrumentation
 
     def compute_track_centerline(self, yellow_cones, blue_cones, start_pos):
         """
         Utilise RRT* pour générer une trajectoire, mais retourne le chemin brut.
         Le lissage se fera entièrement dans smooth_path.
         """
-        if not yellow_cones or not blue_cones:
+        if len(yellow_cones) == 0 or len(blue_cones) == 0:
             print("Erreur: Pas assez de cônes.")
             return []
+        return self.compute_from_context(TrackContext(yellow_cones, blue_cones, start_pos))
 
-        yellow = np.array(yellow_cones)
-        blue = np.array(blue_cones)
+    def compute_from_context(self, context, on_segment=None):
+        """
+        Comme compute_track_centerline, en réutilisant l'appariement, l'ordre des
+        checkpoints et la structure de collision déjà calculés dans context (TrackContext).
+        on_segment(points) est appelée, dans l'ordre, dès qu'un segment est planifié
+        (ligne droite [départ, but] si RRT* a échoué), pour afficher le chemin au fur et à mesure.
+        """
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        yellow, blue, start_pos = context.yellow, context.blue, context.start_pos
+        self.stats = {}
 
         # 1. Identifier les midpoints (Checkpoints)
-        midpoints = []
-        for y_pt in yellow:
-            dists = np.linalg.norm(blue - y_pt, axis=1)
-            nearest_blue_idx = np.argmin(dists)
-            b_pt = blue[nearest_blue_idx]
-            mid = (y_pt + b_pt) / 2
-            midpoints.append(mid)
-
-        midpoints = np.array(midpoints)
+        t0 = time.perf_counter()
+        midpoints, nearest_blue = context.midpoints, context.nearest_blue
+        self.stats["pairing"] = time.perf_counter() - t0
         if len(midpoints) == 0: return []
 
         # 2. Tri des checkpoints
-        start_arr = np.array(start_pos)
-        dists_to_start = np.linalg.norm(midpoints - start_arr, axis=1)
-        current_idx = np.argmin(dists_to_start)
-
-        sorted_indices = [current_idx]
-        visited = set([current_idx])
-        n_points = len(midpoints)
-
-        while len(sorted_indices) < n_points:
-            current_pos = midpoints[current_idx]
-            dists = np.linalg.norm(midpoints - current_pos, axis=1)
-            dists[list(visited)] = np.inf
-            next_idx = np.argmin(dists)
-            if dists[next_idx] == np.inf: break
-            sorted_indices.append(next_idx)
-            visited.add(next_idx)
-            current_idx = next_idx
-
-        waypoints = [midpoints[i] for i in sorted_indices]
+        t0 = time.perf_counter()
+        sorted_indices = context.order
+        self.stats["ordering"] = time.perf_counter() - t0
+
+        waypoints = [tuple(midpoints[i]) for i in sorted_indices]
 
         # 3. Préparation RRT
-        obstacle_list = []
-        cone_radius = 1.2  # Marge de sécurité augmentée pour éviter de raser les cônes
-        for c in yellow_cones: obstacle_list.append((c[0], c[1], cone_radius))
-        for c in blue_cones: obstacle_list.append((c[0], c[1], cone_radius))
+        # Structure de collision construite une seule fois et partagée par tous les segments
+        if self.collision_z is not None and context.covariances is not None:
+            collision_checker = context.collision_checker(CONE_BASE_RADIUS, self.collision_z)
+        else:
+            collision_checker = context.collision_checker(CONE_RADIUS)
 
-        all_x = [x for x, y in yellow_cones] + [x for x, y in blue_cones]
-        all_y = [y for x, y in yellow_cones] + [y for x, y in blue_cones]
-        rand_area = [min(all_x) - 5, max(all_x) + 5]  # min/max simplifié
+        targets = waypoints + [waypoints[0]] if context.closed else waypoints  # Boucle fermée
+        # Chaque segment part du checkpoint précédent (le premier part de la voiture)
+        starts = [tuple(start_pos)] + targets[:-1]
 
-        full_path = []
-        current_pos = start_pos
-        targets = waypoints + [waypoints[0]]  # Boucle fermée
+        left = yellow[sorted_indices]
+        right = blue[nearest_blue[sorted_indices]]
+        samplers = self._segment_samplers(starts, targets, left, right, context.closed)
 
         # 4. Exécution RRT
         print(f"RRT* en cours sur {len(targets)} segments...")
-        for i, target in enumerate(targets):
-            # Paramètres RRT ajustés pour être moins chaotiques
-            rrt = RRTStar(start=current_pos, goal=target,
-                          obstacle_list=obstacle_list,
-                          rand_area=rand_area,
-                          max_iter=200,  # Un peu plus d'itérations
-                          expand_dis=3.0,  # Pas plus grands
-                          path_resolution=1.0)  # Résolution plus grossière pour moins de bruit
-
-            segment = rrt.plan()
+        t0 = time.perf_counter()
+        segments = self._plan_segments(starts, targets, collision_checker, samplers, deadline, on_segment)
+        self.stats["planning"] = time.perf_counter() - t0
+        self.stats["segments"] = len(segments)
+        self.stats["fallback_segments"] = sum(1 for segment in segments if not segment)
+        self.stats["grid_segments"] = self._grid_segments
+        if self.instrumentation is not None:
+            self.instrumentation.event("compute", planner="rrt", **self.stats)
 
+        full_path = []
+        for target, segment in zip(targets, segments):
             if segment:
                 if len(full_path) > 0:
                     full_path.extend(segment[1:])
                 else:
                     full_path.extend(segment)
-                current_pos = segment[-1]
             else:
                 # Fallback ligne droite
                 full_path.append(tuple(target))
-                current_pos = target
 
         return full_path
 
-    def smooth_path(self, path):
+    def _segment_samplers(self, starts, targets, left, right, closed=True):
+        """
+        Zone d'échantillonnage de chaque segment. left/right sont les cônes
+        jaunes/bleus appariés, dans l'ordre des checkpoints.
+        """
+        if self.sampling == "box":
+            all_cones = np.vstack((left, right))
+            lo = all_cones.min(axis=0) - 5
+            hi = all_cones.max(axis=0) + 5
+            box = BoxSampler((lo[0], hi[0]), (lo[1], hi[1]))
+            return [box] * len(targets)
+
+        if self.sampling == "local":
+            return [BoxSampler.around_segment(start, goal, self.local_margin)
+                    for start, goal in zip(starts, targets)]
+
+        # Le segment k relie les paires k-1 et k, soit le quad k-1 du couloir
+        corridor = CorridorSampler(left, right, closed=closed)
+        w = self.corridor_window
+        return [corridor.local(k - 1 - w, k - 1 + w) for k in range(len(targets))]
+
+    def _segment_rngs(self, n_segments):
+        if self.seed is None:
+            return [None] * n_segments
+        if isinstance(self.seed, np.random.Generator):
+            return self.seed.spawn(n_segments)
+        seed_seq = self.seed if isinstance(self.seed, np.random.SeedSequence) else np.random.SeedSequence(self.seed)
+        return seed_seq.spawn(n_segments)
+
+    def _plan_segments(self, starts, targets, collision_checker, samplers, deadline=None, on_segment=None):
+        rngs = self._segment_rngs(len(targets))
+        segments = []
+        self._grid_segments = 0
+        inst = self.instrumentation
+        instrument = inst is not None
+
+        def done(result, start, goal):
+            segment, seg_stats, grid = result
+            self._grid_segments += grid
+            if inst is not None:
+                inst.merge(seg_stats)
+                inst.count("fallback_segments" if not segment else "grid_segments" if grid else "planned_segments")
+                inst.event("segment", index=len(segments), start=[float(v) for v in start],
+                           goal=[float(v) for v in goal], fallback=not segment, grid=grid,
+                           iterations=seg_stats["counters"].get("iterations", 0),
+                           seconds=seg_stats["timers"]["segment"]["seconds"])
+            segments.append(segment)
+            if on_segment is not None:
+                on_segment(segment if segment else [tuple(start), tuple(goal)])
+
+        if self.workers <= 1 or len(targets) < 2:
+            for start, goal, sampler, rng in zip(starts, targets, samplers, rngs):
+                if deadline is not None and time.perf_counter() > deadline:
+                    raise TimeoutError(f"RRT* : limite de {self.time_limit} s dépassée")
+                done(_plan_segment_with_stats(start, goal, collision_checker, sampler, rng, self.rrt_options,
+                                              instrument, self.grid_fallback), start, goal)
+            return segments
+
+        workers = min(self.workers, len(targets))
+        chunksize = max(1, len(targets) // (4 * workers))
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_segment_worker,
+                                       initargs=(collision_checker, self.rrt_options, instrument, self.grid_fallback))
+        timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        try:
+            # map rend les segments dans l'ordre, au fur et à mesure
+            results = executor.map(_plan_segment_in_worker, zip(starts, targets, samplers, rngs),
+                                   chunksize=chunksize, timeout=timeout)
+            for result, start, goal in zip(results, starts, targets):
+                done(result, start, goal)
+        except BaseException as e:
+            # Ne pas attendre les segments en cours : le résultat est abandonné
+            executor.shutdown(wait=False, cancel_futures=True)
+            if isinstance(e, TimeoutError):
+                raise TimeoutError(f"RRT* : limite de {self.time_limit} s dépassée") from e
+            raise
+        executor.shutdown()
+        return segments
+
+    def smooth_path(self, path, spacing=None):
         """
         Lissage Robuste : Filtrage -> Moyenne Glissante -> Spline
+        spacing : si donné, le chemin lissé est rééchantillonné tous les spacing mètres
+        d'abscisse curviligne (sinon len(path) * 5 points répartis en paramètre de spline).
         """
         if len(path) < 3: return path
-        path_arr = np.array(path)
 
         # --- Étape 1 : Filtrage spatial (Supprimer les points trop proches) ---
         # On garde un point tous les X mètres pour définir la structure globale
         min_dist = 1.5
-        clean_path = [path_arr[0]]
-        for pt in path_arr[1:]:
-            if np.linalg.norm(pt - clean_path[-1]) > min_dist:
-                clean_path.append(pt)
+        inst = self.instrumentation
+        with timer(inst, "smooth_filter"):
+            clean_path = filter_min_distance(path, min_dist)
 
         # Fermer la boucle proprement si nécessaire
         if np.linalg.norm(clean_path[0] - clean_path[-1]) > min_dist:
-            clean_path.append(clean_path[0])  # On force la fermeture
+            clean_path = np.vstack((clean_path, clean_path[:1]))  # On force la fermeture
 
-        clean_path = np.array(clean_path)
         if len(clean_path) < 3: return path
 
         # --- Étape 2 : Moyenne Glissante (Iterative Smoothing) ---
         # C'est ce qui empêche la trajectoire de partir à l'opposé.
-        # On lisse les angles vifs du RRT géométriquement.
-        smoothed_points = np.copy(clean_path)
-        iterations = 3  # Nombre de passes de lissage
-        alpha = 0.3  # Force du lissage (0 = pas de changement, 1 = max)
-
-        for _ in range(iterations):
-            # Pour chaque point (sauf premier et dernier si pas boucle), on le rapproche de la moyenne de ses voisins
-            # Ici on traite comme une boucle fermée
-            num_pts = len(smoothed_points)
-            new_points = np.copy(smoothed_points)
-            for i in range(num_pts):
-                prev_p = smoothed_points[(i - 1) % num_pts]
-                curr_p = smoothed_points[i]
-                next_p = smoothed_points[(i + 1) % num_pts]
-
-                # Formule de lissage simple : P_new = (1-a)*P + a*(Prev + Next)/2
-                new_points[i] = (1 - alpha) * curr_p + alpha * (prev_p + next_p) / 2
-            smoothed_points = new_points
+        # On lisse les angles vifs du RRT géométriquement, traité comme une boucle fermée :
+        # P_new = (1-a)*P + a*(Prev + Next)/2, 3 passes avec a = 0.3
+        with timer(inst, "smooth_laplacian"):
+            smoothed_points = laplacian_smooth(clean_path, alpha=0.3, iterations=3, closed=True)
 
         # --- Étape 3 : B-Spline Finale ---
+        # SciPy n'est importé qu'au premier lissage : la planification brute s'en passe
+        from scipy.interpolate import splprep
         try:
             x = smoothed_points[:, 0]
             y = smoothed_points[:, 1]
 
             # S=0 force la courbe à passer EXACTEMENT par nos points lissés (étape 2)
             # S élevé permet de couper. Comme on a déjà lissé à l'étape 2, on peut mettre s=0 ou petit.
-            tck, u = splprep([x, y], s=0.5, k=3, per=True)
-
-            u_new = np.linspace(0, 1, num=len(path) * 5)  # Haute résolution
-            x_new, y_new = splev(u_new, tck)
+            with timer(inst, "smooth_spline"):
+                tck, u = splprep([x, y], s=0.5, k=3, per=True)
 
-            return list(zip(x_new, y_new))
+                # Haute résolution, ou espacement constant le long de la courbe
+                smoothed = evaluate_spline(tck, num=len(path) * 5, spacing=spacing)
         except Exception as e:
             print(f"Erreur Spline: {e}. Retour au chemin lissé géométriquement.")
-            return smoothed_points.tolist()
\ No newline at end of file
+            smoothed = smoothed_points.tolist()
+        if inst is not None:
+            inst.event("smooth", raw_points=len(path), filtered_points=len(clean_path), points=len(smoothed))
+        return smoothed
@@ -0,0 +1,64 @@
+import numpy as np
+
+from core.spatial_index import SpatialHashGrid
+
+
+class RRTTree:
+    """
+    Compact RRT tree: coordinates, parent indices and costs live in
+    preallocated NumPy arrays that double in size when full.
+    The root has parent -1.
+    """
+
+    def __init__(self, cell_size, capacity=256):
+        capacity = max(1, int(capacity))
+        self.x = np.empty(capacity, dtype=float)
+        self.y = np.empty(capacity, dtype=float)
+        self.parent = np.full(capacity, -1, dtype=np.intp)
+        self.cost = np.empty(capacity, dtype=float)
+        self.size = 0
+        self.index = SpatialHashGrid(cell_size)
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        capacity = 2 * len(self.x)
+        for name in ("x", "y", "parent", "cost"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add(self, x, y, parent=-1, cost=0.0):
+        if self.size == len(self.x):
+            self._grow()
+        i = self.size
+        self.x[i] = x
+        self.y[i] = y
+        self.parent[i] = parent
+        self.cost[i] = cost
+        self.size += 1
+        self.index.insert(x, y)
+        return i
+
+    def nearest(self, x, y):
+        return self.index.nearest(x, y)
+
+    def within_radius(self, x, y, r):
+        return np.asarray(self.index.within_radius(x, y, r), dtype=np.intp)
+
+    def path_to_root(self, i):
+        """Returns the list of [x, y] points from node i back to the root."""
+        path = []
+        while i >= 0:
+            path.append([float(self.x[i]), float(self.y[i])])
+            i = self.parent[i]
+        return path
+
+    def path_length_to_root(self, i):
+        """Actual length of the branch from node i to the root, independent of the stored costs."""
+        pts = np.array(self.path_to_root(i))
+        if len(pts) < 2:
+            return 0.0
+        return float(np.hypot(*np.diff(pts, axis=0).T).sum())
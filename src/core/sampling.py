@@ -0,0 +1,145 @@
+import numpy as np
+
+
+class BoxSampler:
+    """
+    Uniform samples in an axis-aligned box, with independent bounds per axis.
+    """
+
+    def __init__(self, x_range, y_range):
+        self.x_range = (float(x_range[0]), float(x_range[1]))
+        self.y_range = (float(y_range[0]), float(y_range[1]))
+
+    @classmethod
+    def from_rand_area(cls, rand_area):
+        """
+        Accepts the legacy [min, max] area (same bounds on both axes)
+        or [(min_x, max_x), (min_y, max_y)].
+        """
+        if np.ndim(rand_area) == 1:
+            return cls(rand_area, rand_area)
+        return cls(rand_area[0], rand_area[1])
+
+    @classmethod
+    def around_segment(cls, start, goal, margin):
+        """Box enclosing start and goal, grown by margin on every side."""
+        xs = (start[0], goal[0])
+        ys = (start[1], goal[1])
+        return cls((min(xs) - margin, max(xs) + margin), (min(ys) - margin, max(ys) + margin))
+
+    def sample(self, rng, n):
+        xs = rng.uniform(self.x_range[0], self.x_range[1], n)
+        ys = rng.uniform(self.y_range[0], self.y_range[1], n)
+        return xs, ys
+
+
+class CorridorSampler:
+    """
+    Uniform samples in the drivable corridor described by ordered cone pairs.
+    Quad i spans pairs i and i + 1 (left_i, right_i, right_i+1, left_i+1) and is
+    split in two triangles; triangles are drawn proportionally to their area.
+    """
+
+    def __init__(self, left, right, closed=True):
+        left = np.asarray(left, dtype=float).reshape(-1, 2)
+        right = np.asarray(right, dtype=float).reshape(-1, 2)
+        if len(left) != len(right):
+            raise ValueError("left and right must hold the same number of cones")
+
+        if closed:
+            left_next = np.roll(left, -1, axis=0)
+            right_next = np.roll(right, -1, axis=0)
+        else:
+            left_next, right_next = left[1:], right[1:]
+            left, right = left[:-1], right[:-1]
+
+        # Triangles (l_i, r_i, r_i+1) and (l_i, r_i+1, l_i+1), interleaved by quad
+        self.tri_a = np.repeat(left, 2, axis=0)
+        self.tri_b = np.empty_like(self.tri_a)
+        self.tri_c = np.empty_like(self.tri_a)
+        self.tri_b[0::2] = right
+        self.tri_c[0::2] = right_next
+        self.tri_b[1::2] = right_next
+        self.tri_c[1::2] = left_next
+        self.n_quads = len(left)
+        self.closed = closed
+        self._set_areas()
+
+    def _set_areas(self):
+        ab = self.tri_b - self.tri_a
+        ac = self.tri_c - self.tri_a
+        self.areas = np.abs(ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]) / 2.0
+        total = self.areas.sum()
+        self.cum_areas = np.cumsum(self.areas) / total if total > 0 else None
+
+    def local(self, first_quad, last_quad):
+        """
+        Returns a sampler restricted to quads first_quad..last_quad (inclusive),
+        indices wrapping around the loop, or clamped to the ends of an open corridor
+        (no quad joins its last and first pairs).
+        """
+        quads = np.arange(first_quad, last_quad + 1)
+        if self.closed:
+            quads %= self.n_quads
+        else:
+            quads = np.unique(np.clip(quads, 0, self.n_quads - 1))
+        tris = np.column_stack((2 * quads, 2 * quads + 1)).ravel()
+
+        sub = CorridorSampler.__new__(CorridorSampler)
+        sub.tri_a = self.tri_a[tris]
+        sub.tri_b = self.tri_b[tris]
+        sub.tri_c = self.tri_c[tris]
+        sub.n_quads = len(quads)
+        sub.closed = False
+        sub._set_areas()
+        return sub
+
+    def sample(self, rng, n):
+        if self.cum_areas is None:
+            # Degenerate corridor: fall back to the triangle vertices
+            pts = self.tri_a[rng.integers(0, len(self.tri_a), n)]
+            return pts[:, 0].copy(), pts[:, 1].copy()
+
+        tri = np.searchsorted(self.cum_areas, rng.random(n), side="right")
+        np.minimum(tri, len(self.cum_areas) - 1, out=tri)
+
+        # Uniform point in a triangle: reflect (u, v) back into the lower half of the unit square
+        u = rng.random(n)
+        v = rng.random(n)
+        flip = u + v > 1.0
+        u[flip] = 1.0 - u[flip]
+        v[flip] = 1.0 - v[flip]
+
+        a = self.tri_a[tri]
+        pts = a + u[:, None] * (self.tri_b[tri] - a) + v[:, None] * (self.tri_c[tri] - a)
+        return pts[:, 0], pts[:, 1]
+
+
+class EllipseSampler:
+    """
+    Uniform samples in the ellipse of points p such that
+    |p - start| + |p - goal| <= c_best (informed set of Informed RRT*).
+    """
+
+    def __init__(self, start, goal, c_best):
+        start = np.asarray(start, dtype=float)
+        goal = np.asarray(goal, dtype=float)
+        c_min = float(np.hypot(*(goal - start)))
+        c_best = max(float(c_best), c_min)
+
+        self.center = (start + goal) / 2.0
+        self.semi_major = c_best / 2.0
+        self.semi_minor = np.sqrt(c_best ** 2 - c_min ** 2) / 2.0
+        theta = np.arctan2(goal[1] - start[1], goal[0] - start[0])
+        self.cos_t = np.cos(theta)
+        self.sin_t = np.sin(theta)
+
+    def sample(self, rng, n):
+        # Uniform point in the unit disk, stretched to the ellipse then rotated
+        r = np.sqrt(rng.random(n))
+        phi = 2.0 * np.pi * rng.random(n)
+        ex = self.semi_major * r * np.cos(phi)
+        ey = self.semi_minor * r * np.sin(phi)
+        xs = self.center[0] + self.cos_t * ex - self.sin_t * ey
+        ys = self.center[1] + self.sin_t * ex + self.cos_t * ey
+        return xs, ys
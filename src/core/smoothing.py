@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+
+
+def filter_min_distance(points, min_dist):
+    """
+    Keeps the first point, then every point further than min_dist from the last
+    kept one. Each kept point depends on the previous one, so this is a plain
+    loop over Python floats: cheaper than NumPy calls on a few points at a time.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(points) == 0:
+        return points
+
+    min_d2 = min_dist * min_dist
+    keep = [0]
+    lx, ly = points[0]
+    for i, (x, y) in enumerate(points.tolist()):
+        if (x - lx) ** 2 + (y - ly) ** 2 > min_d2:
+            keep.append(i)
+            lx, ly = x, y
+    return points[keep]
+
+
+def laplacian_smooth(points, alpha=0.3, iterations=3, closed=True):
+    """
+    Iterative neighbour averaging: P <- (1 - alpha) * P + alpha * (prev + next) / 2,
+    every point updated from the previous pass. With closed=False the end points stay fixed.
+    """
+    pts = np.array(points, dtype=float).reshape(-1, 2)
+    if len(pts) < 3:
+        return pts
+    for _ in range(iterations):
+        neighbours = (np.roll(pts, 1, axis=0) + np.roll(pts, -1, axis=0)) / 2
+        if closed:
+            pts = (1 - alpha) * pts + alpha * neighbours
+        else:
+            pts[1:-1] = (1 - alpha) * pts[1:-1] + alpha * neighbours[1:-1]
+    return pts
+
+
+def arc_length_parameters(tck, spacing, n_dense=None):
+    """
+    Spline parameters of points spaced every `spacing` metres along the curve,
+    first and last points included. The arc length is measured on a dense
+    polyline sampling of the spline.
+    """
+    from scipy.interpolate import splev
+
+    if n_dense is None:
+        n_dense = max(1000, 20 * len(tck[1][0]))
+    u_dense = np.linspace(0.0, 1.0, n_dense)
+    x, y = splev(u_dense, tck)
+    s_dense = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+
+    n_out = max(2, math.ceil(s_dense[-1] / spacing) + 1)
+    return np.interp(np.linspace(0.0, s_dense[-1], n_out), s_dense, u_dense)
+
+
+def evaluate_spline(tck, num=None, spacing=None):
+    """
+    Evaluates the spline either at num evenly spaced parameters (legacy behaviour)
+    or every `spacing` metres of arc length. Returns a list of (x, y) tuples.
+    """
+    # SciPy is imported on first use, the raw planning does not need it
+    from scipy.interpolate import splev
+
+    if spacing is not None:
+        u_new = arc_length_parameters(tck, spacing)
+    else:
+        u_new = np.linspace(0, 1, num=num)
+    x_new, y_new = splev(u_new, tck)
+    return list(zip(x_new, y_new))
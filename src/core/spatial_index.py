@@ -0,0 +1,200 @@
+import math
+import sys
+
+import numpy as np
+
+# Without SciPy loaded, nearest_neighbours computes up to this many (query, point)
+# distances with NumPy rather than paying the ~0.3 s import of scipy.spatial
+BRUTE_FORCE_PAIRS = 2_000_000
+# Distances computed at once by the brute force, to bound its memory
+_CHUNK_PAIRS = 1 << 18
+
+
+class SpatialHashGrid:
+    """
+    Incremental uniform hash grid over 2D points.
+    Points are identified by their insertion index, which never changes.
+    """
+
+    def __init__(self, cell_size):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be strictly positive")
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        self.xs = []
+        self.ys = []
+        # Bounding box of the occupied cells, used to stop the ring search
+        self.min_key = None
+        self.max_key = None
+
+    def __len__(self):
+        return len(self.xs)
+
+    def _key(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _add_to_cell(self, key, index):
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [index]
+        else:
+            bucket.append(index)
+
+        if self.min_key is None:
+            self.min_key = key
+            self.max_key = key
+        else:
+            self.min_key = (min(self.min_key[0], key[0]), min(self.min_key[1], key[1]))
+            self.max_key = (max(self.max_key[0], key[0]), max(self.max_key[1], key[1]))
+
+    def insert(self, x, y):
+        index = len(self.xs)
+        self.xs.append(x)
+        self.ys.append(y)
+        self._add_to_cell(self._key(x, y), index)
+        return index
+
+    def move(self, index, x, y):
+        old_key = self._key(self.xs[index], self.ys[index])
+        new_key = self._key(x, y)
+        self.xs[index] = x
+        self.ys[index] = y
+        if old_key != new_key:
+            bucket = self.cells[old_key]
+            bucket.remove(index)
+            if not bucket:
+                del self.cells[old_key]
+            self._add_to_cell(new_key, index)
+
+    def nearest(self, x, y):
+        """
+        Returns the index of the point closest to (x, y), or None if the grid is empty.
+        Ties are resolved in favour of the lowest index.
+        """
+        n = len(self.xs)
+        if n == 0:
+            return None
+
+        kx, ky = self._key(x, y)
+        # Number of rings needed to cover every occupied cell
+        max_ring = max(abs(kx - self.min_key[0]), abs(kx - self.max_key[0]),
+                       abs(ky - self.min_key[1]), abs(ky - self.max_key[1]))
+
+        best_ind = None
+        best_d = float("inf")
+        ring = 0
+        while ring <= max_ring:
+            # A ring of radius k holds 8k cells: past this point a plain scan is cheaper
+            if 4 * ring * ring > n:
+                return self._nearest_linear(x, y)
+
+            for key in self._ring_keys(kx, ky, ring):
+                bucket = self.cells.get(key)
+                if bucket is None:
+                    continue
+                for i in bucket:
+                    d = (self.xs[i] - x) ** 2 + (self.ys[i] - y) ** 2
+                    if d < best_d or (d == best_d and i < best_ind):
+                        best_d = d
+                        best_ind = i
+
+            # Every cell beyond this ring is at least ring * cell_size away
+            if best_ind is not None and best_d <= (ring * self.cell_size) ** 2:
+                break
+            ring += 1
+
+        return best_ind
+
+    def _nearest_linear(self, x, y):
+        xs, ys = self.xs, self.ys
+        d_list = [(xs[i] - x) ** 2 + (ys[i] - y) ** 2 for i in range(len(xs))]
+        return d_list.index(min(d_list))
+
+    def within_radius(self, x, y, r):
+        """
+        Returns the sorted indices of all points at distance <= r from (x, y).
+        """
+        if not self.xs:
+            return []
+
+        r2 = r * r
+        kx0, ky0 = self._key(x - r, y - r)
+        kx1, ky1 = self._key(x + r, y + r)
+
+        # Clip the query window to the occupied area
+        kx0 = max(kx0, self.min_key[0])
+        ky0 = max(ky0, self.min_key[1])
+        kx1 = min(kx1, self.max_key[0])
+        ky1 = min(ky1, self.max_key[1])
+
+        result = []
+        if (kx1 - kx0 + 1) * (ky1 - ky0 + 1) > len(self.cells):
+            # Large radius: visit the occupied cells rather than the whole window
+            for (cx, cy), bucket in self.cells.items():
+                if kx0 <= cx <= kx1 and ky0 <= cy <= ky1:
+                    self._collect(bucket, x, y, r2, result)
+        else:
+            for cx in range(kx0, kx1 + 1):
+                for cy in range(ky0, ky1 + 1):
+                    bucket = self.cells.get((cx, cy))
+                    if bucket is not None:
+                        self._collect(bucket, x, y, r2, result)
+
+        result.sort()
+        return result
+
+    def _collect(self, bucket, x, y, r2, result):
+        for i in bucket:
+            if (self.xs[i] - x) ** 2 + (self.ys[i] - y) ** 2 <= r2:
+                result.append(i)
+
+    @staticmethod
+    def _ring_keys(kx, ky, ring):
+        if ring == 0:
+            yield kx, ky
+            return
+        for dx in range(-ring, ring + 1):
+            yield kx + dx, ky - ring
+            yield kx + dx, ky + ring
+        for dy in range(-ring + 1, ring):
+            yield kx - ring, ky + dy
+            yield kx + ring, ky + dy
+
+
+def preload_kdtree():
+    """
+    Imports scipy.spatial, so that nearest_neighbours uses its KD-tree. For the
+    code paths that load SciPy anyway (collision checks, spline smoothing),
+    before the cones are paired.
+    """
+    import scipy.spatial  # noqa: F401
+
+
+def nearest_neighbours(points, queries, k=1):
+    """
+    Indices of the k points nearest to each query, nearest first: an array of
+    shape (len(queries),) for k=1, (len(queries), k) otherwise (k <= len(points)).
+    Uses scipy.spatial.cKDTree once SciPy is loaded (see preload_kdtree). Before
+    that, up to BRUTE_FORCE_PAIRS query/point pairs (every track of data/), the
+    distances are computed with NumPy so that SciPy is not imported (raw
+    midpoints path); larger sets import it.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    queries = np.asarray(queries, dtype=float).reshape(-1, 2)
+    if "scipy.spatial" in sys.modules or len(points) * len(queries) > BRUTE_FORCE_PAIRS:
+        from scipy.spatial import cKDTree
+        _, indices = cKDTree(points).query(queries, k=k)
+        return np.asarray(indices, dtype=np.intp)
+
+    indices = np.empty((len(queries), k), dtype=np.intp)
+    step = max(1, _CHUNK_PAIRS // max(1, len(points)))
+    for lo in range(0, len(queries), step):
+        q = queries[lo:lo + step]
+        d2 = (q[:, 0, None] - points[:, 0]) ** 2 + (q[:, 1, None] - points[:, 1]) ** 2
+        if k == 1:
+            indices[lo:lo + step, 0] = d2.argmin(axis=1)
+            continue
+        part = np.argpartition(d2, k - 1, axis=1)[:, :k] if k < len(points) else np.tile(np.arange(k), (len(q), 1))
+        order = np.argsort(np.take_along_axis(d2, part, axis=1), axis=1, kind="stable")
+        indices[lo:lo + step] = np.take_along_axis(part, order, axis=1)
+    return indices[:, 0] if k == 1 else indices
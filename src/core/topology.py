@@ -0,0 +1,103 @@
+"""
+Track topology: start/finish line, driving direction and checkpoint order.
+
+Cones follow the Formula Student convention: blue cones on the left of the
+driving direction, yellow cones on the right. Each yellow/blue pair therefore
+gives the local driving direction, and the checkpoints can be ordered by a
+walk that always moves forward, starting at the start/finish line marked by
+the big orange cones.
+"""
+import numpy as np
+
+from core.spatial_index import nearest_neighbours
+
+# Neighbours of each checkpoint considered by the walk
+WALK_NEIGHBOURS = 8
+# The loop is closed if its last step is at most this many times the longest other step
+CLOSURE_FACTOR = 3.0
+
+
+def start_line(big_orange, start_pos):
+    """
+    Centre of the start/finish gate: the big orange cones nearest to start_pos
+    (at most four, two on each side). Returns start_pos without big orange cones.
+    """
+    big_orange = np.asarray(big_orange, dtype=float).reshape(-1, 2)
+    start = np.asarray(start_pos, dtype=float)
+    if len(big_orange) == 0:
+        return start
+    d = np.hypot(*(big_orange - start).T)
+    return big_orange[np.argsort(d)[:4]].mean(axis=0)
+
+
+def forward_directions(yellow, blue):
+    """Unit driving direction at each yellow/blue pair (blue on the left)."""
+    v = np.asarray(blue, dtype=float) - np.asarray(yellow, dtype=float)
+    forward = np.column_stack((v[:, 1], -v[:, 0]))
+    return forward / np.maximum(np.hypot(*forward.T), 1e-12)[:, None]
+
+
+def walk_checkpoints(points, forward, start, k=WALK_NEIGHBOURS):
+    """
+    Orders the checkpoints by walking from the first one past `start` (the
+    start/finish line) to the nearest unvisited neighbour ahead of the current
+    one, according to its driving direction forward[i].
+    The neighbours of every checkpoint come from a single nearest-neighbour
+    query (core.spatial_index.nearest_neighbours), so the walk is linear in the
+    number of checkpoints.
+    The walk ends when the only checkpoint left ahead is the first one (loop
+    closed): a checkpoint the walk stepped over (e.g. the midpoint of a cone
+    paired across the track) is left out of the order.
+    Returns the list of indices, or None if the walk gets stuck anywhere else
+    (the caller then falls back to order_checkpoints).
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    n_points = len(points)
+    if n_points < 3:
+        return None
+
+    k = min(k + 1, n_points)
+    neighbours = nearest_neighbours(points, points, k=k)[:, 1:].tolist()
+
+    # First checkpoint ahead of the start line, among the ones closest to it
+    near_start = nearest_neighbours(points, start, k=k)[0]
+    ahead = [int(i) for i in near_start if np.dot(points[i] - start, forward[i]) >= 0]
+    if not ahead:
+        return None
+    current = ahead[0]
+
+    pts = points.tolist()
+    fwd = forward.tolist()
+    visited = [False] * n_points
+    visited[current] = True
+    order = [current]
+    while len(order) < n_points:
+        x, y = pts[current]
+        fx, fy = fwd[current]
+        nxt = None
+        for j in neighbours[current]:
+            if not visited[j] and (pts[j][0] - x) * fx + (pts[j][1] - y) * fy > 0:
+                nxt = j
+                break
+        if nxt is None:
+            first = order[0]
+            if first in neighbours[current] and (pts[first][0] - x) * fx + (pts[first][1] - y) * fy > 0:
+                break  # Back at the start line
+            return None
+        visited[nxt] = True
+        order.append(nxt)
+        current = nxt
+    return order
+
+
+def is_closed_loop(points, order, factor=CLOSURE_FACTOR):
+    """
+    True if the ordered checkpoints form a loop: the step from the last one
+    back to the first is no longer than factor times the longest step of the walk.
+    """
+    if len(order) < 3:
+        return False
+    p = np.asarray(points, dtype=float)[order]
+    steps = np.hypot(*np.diff(p, axis=0).T)
+    closing = float(np.hypot(*(p[0] - p[-1])))
+    return closing <= factor * float(steps.max())
@@ -0,0 +1,105 @@
+import numpy as np
+
+from core.checkpoints import pair_midpoints, order_checkpoints
+from core.collision import ConeCollisionChecker, chance_constrained_radii
+from core.topology import forward_directions, is_closed_loop, start_line, walk_checkpoints
+
+
+def _split_covariances(cones, covariances):
+    cones = np.asarray(cones, dtype=float)
+    if cones.ndim == 2 and cones.shape[1] == 5:
+        return cones[:, :2], (cones[:, 2:] if covariances is None else covariances)
+    return cones, covariances
+
+
+class TrackContext:
+    """
+    Cones of a loaded track with the structures every planner derives from them
+    (yellow/blue pairing, checkpoint order, collision checkers), computed on
+    first use and shared by all the planners run on the same track.
+    """
+
+    def __init__(self, yellow_cones, blue_cones, start_pos, yellow_covariances=None, blue_covariances=None,
+                 big_orange_cones=None):
+        """
+        Cones are (x, y) rows, or (x, y, x_variance, y_variance, xy_covariance)
+        rows carrying their own covariances. The big orange cones mark the
+        start/finish line (see core.topology).
+        """
+        yellow_cones, yellow_covariances = _split_covariances(yellow_cones, yellow_covariances)
+        blue_cones, blue_covariances = _split_covariances(blue_cones, blue_covariances)
+        self.yellow = np.asarray(yellow_cones, dtype=float).reshape(-1, 2)
+        self.blue = np.asarray(blue_cones, dtype=float).reshape(-1, 2)
+        self.start_pos = (float(start_pos[0]), float(start_pos[1]))
+        self.big_orange = np.empty((0, 2)) if big_orange_cones is None else \
+            np.asarray(big_orange_cones, dtype=float).reshape(-1, 2)
+        # Position covariances (x_variance, y_variance, xy_covariance) of each cone, if known
+        self.covariances = None
+        if yellow_covariances is not None and blue_covariances is not None:
+            self.covariances = np.vstack((np.asarray(yellow_covariances, dtype=float).reshape(-1, 3),
+                                          np.asarray(blue_covariances, dtype=float).reshape(-1, 3)))
+        self._pairing = None
+        self._order = None
+        self._closed = None
+        self._checkers = {}
+
+    @classmethod
+    def from_track(cls, track):
+        """Builds the context from a TrackArrays (utils.track_utils.load_track_arrays)."""
+        return cls(track.points("yellow"), track.points("blue"), track.start_pos(),
+                   track.covariances("yellow"), track.covariances("blue"), track.points("big_orange"))
+
+    def _pair(self):
+        if self._pairing is None:
+            self._pairing = pair_midpoints(self.yellow, self.blue)
+        return self._pairing
+
+    @property
+    def midpoints(self):
+        return self._pair()[0]
+
+    @property
+    def nearest_blue(self):
+        return self._pair()[1]
+
+    @property
+    def order(self):
+        """
+        Checkpoint indices in driving order, from the start/finish line (see
+        core.topology.walk_checkpoints), or by greedy nearest neighbour from
+        start_pos if the walk fails.
+        """
+        if self._order is None:
+            self._order, self._closed = self._walk()
+        return self._order
+
+    @property
+    def closed(self):
+        """True if the ordered checkpoints form a loop (the path returns to the first one)."""
+        if self._order is None:
+            self._order, self._closed = self._walk()
+        return self._closed
+
+    def _walk(self):
+        forward = forward_directions(self.yellow, self.blue[self.nearest_blue])
+        order = walk_checkpoints(self.midpoints, forward, start_line(self.big_orange, self.start_pos))
+        if order is None:
+            # The greedy order is always closed back to its first point
+            return order_checkpoints(self.midpoints, self.start_pos), True
+        return order, is_closed_loop(self.midpoints, order)
+
+    def collision_checker(self, cone_radius, z=None):
+        """
+        Checker over every yellow and blue cone, one per radius.
+        With z, each cone gets the chance-constrained radius cone_radius + z sigma
+        of its position covariance (the fixed cone_radius without covariances).
+        """
+        key = (cone_radius, z if self.covariances is not None else None)
+        checker = self._checkers.get(key)
+        if checker is None:
+            radii = cone_radius
+            if key[1] is not None:
+                radii = chance_constrained_radii(self.covariances, cone_radius, z)
+            checker = ConeCollisionChecker(np.vstack((self.yellow, self.blue)), radii)
+            self._checkers[key] = checker
+        return checker
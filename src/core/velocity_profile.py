@@ -0,0 +1,113 @@
+import numpy as np
+
+# Vehicle limits used by default (Formula Student car)
+V_MAX = 20.0  # Top speed (m/s)
+A_LAT = 10.0  # Lateral acceleration in corners (m/s^2)
+A_ACCEL = 5.0  # Longitudinal acceleration (m/s^2)
+A_BRAKE = 8.0  # Braking deceleration (m/s^2)
+
+
+class VelocityProfile:
+    """
+    Per point of a path: arc length s (m), signed curvature (1/m), speed (m/s)
+    and time stamp (s). lap_time is the time of the last point, plus the
+    closing segment back to the first point for a closed path.
+    """
+
+    def __init__(self, s, curvature, speed, time, lap_time):
+        self.s = s
+        self.curvature = curvature
+        self.speed = speed
+        self.time = time
+        self.lap_time = lap_time
+
+    def __len__(self):
+        return len(self.speed)
+
+
+def path_curvature(points, closed=True):
+    """
+    Signed curvature at each point, from the circle through the point and its
+    two neighbours. The end points of an open path get zero curvature.
+    """
+    p = np.asarray(points, dtype=float).reshape(-1, 2)
+    prev_p = np.roll(p, 1, axis=0)
+    next_p = np.roll(p, -1, axis=0)
+    u = p - prev_p
+    v = next_p - p
+    w = next_p - prev_p
+    cross = u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]
+    denom = np.hypot(u[:, 0], u[:, 1]) * np.hypot(v[:, 0], v[:, 1]) * np.hypot(w[:, 0], w[:, 1])
+    curvature = np.divide(2.0 * cross, denom, out=np.zeros(len(p)), where=denom > 0)
+    if not closed and len(p) > 1:
+        curvature[0] = curvature[-1] = 0.0
+    return curvature
+
+
+def _limit_passes(v2_max, ds, a_accel, a_brake):
+    """
+    Squared speeds reachable from the corner limits v2_max: point i cannot go
+    faster than v2_max[j] + 2 a (distance between j and i) for any j before it
+    (acceleration) or after it (braking). Both passes are a running minimum.
+    """
+    s = np.concatenate(([0.0], np.cumsum(ds)))
+    forward = 2.0 * a_accel * s + np.minimum.accumulate(v2_max - 2.0 * a_accel * s)
+    backward = -2.0 * a_brake * s + np.minimum.accumulate((v2_max + 2.0 * a_brake * s)[::-1])[::-1]
+    return np.minimum(forward, backward)
+
+
+def compute_velocity_profile(path, closed=True, v_max=V_MAX, a_lat=A_LAT, a_accel=A_ACCEL, a_brake=A_BRAKE,
+                             v_start=None, v_end=None):
+    """
+    Curvature-limited speed with acceleration and braking limits along path
+    (e.g. the output of smooth_path), fully vectorized.
+    closed : the path is a loop; a last point repeating the first one is allowed.
+    v_start / v_end : speed imposed at the ends of an open path (e.g. 0 for a standing start).
+    """
+    pts = np.asarray(path, dtype=float).reshape(-1, 2)
+    n = len(pts)
+    if n < 2:
+        zeros = np.zeros(n)
+        return VelocityProfile(zeros, zeros, np.full(n, float(v_max)), zeros, 0.0)
+
+    # A closed path given with its first point repeated is handled as the loop of unique points
+    repeated_end = closed and n > 2 and np.allclose(pts[0], pts[-1])
+    loop = pts[:-1] if repeated_end else pts
+    m = len(loop)
+
+    curvature = path_curvature(loop, closed=closed)
+    with np.errstate(divide="ignore"):
+        v_corner = np.sqrt(a_lat / np.abs(curvature))
+    v2_max = np.minimum(v_corner, v_max) ** 2
+
+    if closed:
+        ds = np.hypot(*(np.roll(loop, -1, axis=0) - loop).T)  # ds[i]: i -> i + 1, the last one closes the loop
+        # Three laps end to end, so the limits propagate across the start line; keep the middle one
+        v2 = _limit_passes(np.tile(v2_max, 3), np.tile(ds, 3)[:-1], a_accel, a_brake)[m:2 * m]
+    else:
+        ds = np.hypot(*np.diff(loop, axis=0).T)
+        if v_start is not None:
+            v2_max[0] = min(v2_max[0], v_start ** 2)
+        if v_end is not None:
+            v2_max[-1] = min(v2_max[-1], v_end ** 2)
+        v2 = _limit_passes(v2_max, ds, a_accel, a_brake)
+    speed = np.sqrt(np.maximum(v2, 0.0))
+
+    # Constant acceleration on each segment: dt = 2 ds / (v_i + v_i+1)
+    v_next = np.roll(speed, -1) if closed else speed[1:]
+    v_sum = speed[:len(ds)] + v_next
+    dt = np.divide(2.0 * ds, v_sum, out=np.full(len(ds), np.inf), where=v_sum > 0)
+    dt[ds == 0] = 0.0
+    time = np.concatenate(([0.0], np.cumsum(dt)))
+    s = np.concatenate(([0.0], np.cumsum(ds)))
+    lap_time = float(time[-1])
+
+    if repeated_end:
+        # The repeated point closes the lap
+        return VelocityProfile(s, np.append(curvature, curvature[0]), np.append(speed, speed[0]), time, lap_time)
+    return VelocityProfile(s[:m], curvature, speed, time[:m], lap_time)
+
+
+def lap_time(path, **limits):
+    """Estimated lap time (s) of a closed path, see compute_velocity_profile for the limits."""
+    return compute_velocity_profile(path, closed=True, **limits).lap_time
@@ -1,68 +1,169 @@
+import argparse
+import contextlib
+import sys
 from pathlib import Path
-from utils.track_utils import load_track, get_start_pos, compute_world_bounds
-from ui.process_pygame import process_pygame
-#from core.process_path import PathProcessor
-from core.process_path_rrt import PathProcessor
-
-# from core.process_path import PathProcessor si on souhaite middle points,
-# from core.process_path_rrt import PathProcessor si on souhaite RRT
+from utils.track_utils import load_track_arrays
+from core.collision import COLLISION_Z
+from core.planners import DEFAULT_PLANNER, available_planners, check_planner, run_planners
+from core.track_context import TrackContext
+from core.velocity_profile import compute_velocity_profile
 
 TRACKS = ["small_track.csv", "hairpins_increasing_difficulty.csv", "peanut.csv"]
 
-if __name__ == "__main__":
-    # Setup paths
-    root = Path(__file__).resolve().parents[1]
-    data_dir = root / "data"
 
+def parse_args():
+    planners = available_planners()
+    parser = argparse.ArgumentParser(
+        description="Path planning on a cone track.",
+        epilog="Planners: " + "; ".join(f"{name}: {desc}" for name, desc in planners.items()))
+    parser.add_argument("--planner", action="append", choices=list(planners),
+                        help=f"Planner to run (default {DEFAULT_PLANNER}). Repeat the flag to compare "
+                             "several planners on the same track; the first one is displayed.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the RRT* planner")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="Time limit (s) of the RRT* planning, rrt_fallback switches to midpoints beyond it")
+    parser.add_argument("--collision-z", type=float, default=COLLISION_Z,
+                        help=f"RRT* cone margins from the cone position covariances, at COLLISION_Z standard "
+                             f"deviations (default {COLLISION_Z:g})")
+    parser.add_argument("--fixed-margin", action="store_true",
+                        help="Fixed 1.2 m RRT* margin around every cone, whatever its covariance")
+    parser.add_argument("--spacing", type=float, default=None,
+                        help="Resample the smoothed path every SPACING metres of arc length")
+    parser.add_argument("--track", default=None,
+                        help="Track CSV (file name in data/ or path), instead of the interactive choice")
+    parser.add_argument("--export", default=None, metavar="OUT",
+                        help="Render without window: PNG frames into directory OUT, or raw RGB24 frames "
+                             "on stdout with OUT = -")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame rate of --export")
+    parser.add_argument("--duration", type=float, default=None, help="Simulated seconds of --export (one lap)")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes encoding the PNG frames of --export")
+    parser.add_argument("--no-gui", action="store_true",
+                        help="Plan and print a summary only, without loading pygame")
+    parser.add_argument("--raw", action="store_true",
+                        help="With --no-gui, keep the raw path (no spline smoothing)")
+    parser.add_argument("--output", default=None, metavar="FILE",
+                        help="With --no-gui, write the path of the first planner as x,y lines to FILE (- for stdout)")
+    args = parser.parse_args()
+    if args.planner is None:
+        # PATH_PLANNER bypasses the choices of --planner
+        try:
+            check_planner(DEFAULT_PLANNER)
+        except ValueError as e:
+            parser.error(f"PATH_PLANNER: {e}")
+    return args
+
+
+def choose_track(data_dir):
     print("Choose a track:")
     print("1 - small_track")
     print("2 - hairpins_increasing_difficulty")
     print("3 - peanut")
 
+    choice_str = input("Your choice (1/2/3): ").strip()
     try:
-        choice_str = input("Your choice (1/2/3): ").strip()
         track_choice = int(choice_str)
+    except ValueError:
+        print("Please enter a valid number.")
+        return None
+
+    if 1 <= track_choice <= 3:
+        return data_dir / TRACKS[track_choice - 1]
+    print("Invalid choice.")
+    return None
+
+
+def plan_only(args, context, planner_names, planner_options):
+    """Runs the planners without any window; the path of the first one is written to --output."""
+    to_stdout = args.output == "-"
+    # The path goes to stdout: the planners' messages are sent to stderr
+    with contextlib.redirect_stdout(sys.stderr) if to_stdout else contextlib.nullcontext():
+        results = run_planners(planner_names, context, spacing=args.spacing, smooth=not args.raw,
+                               **planner_options)
+        for name, (_, raw_path, final_path, seconds) in results.items():
+            lap = f", estimated lap time {compute_velocity_profile(final_path).lap_time:.2f} s" \
+                if len(final_path) > 2 else ""
+            print(f"{name}: {len(raw_path)} raw points, {len(final_path)} points, {seconds * 1000:.1f} ms{lap}")
+
+    _, _, final_path, _ = results[planner_names[0]]
+    if not final_path:
+        print("Error: Could not compute a valid path.", file=sys.stderr)
+        return
+    lines = (f"{x},{y}\n" for x, y in final_path)
+    if to_stdout:
+        sys.stdout.writelines(lines)
+    elif args.output is not None:
+        with open(args.output, "w") as f:
+            f.writelines(lines)
+
+
+def export_frames(args, selected_track, track, context, planner_names, planner_options):
+    from ui.export_frames import render_frames
+
+    raw_stream = args.export == "-"
+    # Raw frames go to stdout: the planners' messages are sent to stderr
+    with contextlib.redirect_stdout(sys.stderr) if raw_stream else contextlib.nullcontext():
+        results = run_planners(planner_names[:1], context, spacing=args.spacing, **planner_options)
+    _, raw_path, final_path, _ = results[planner_names[0]]
+    if not raw_path:
+        print("Error: Could not compute a valid path.", file=sys.stderr)
+        return
+
+    profile = compute_velocity_profile(final_path)
+    out = sys.stdout.buffer if raw_stream else args.export
+    n_frames = render_frames(track.to_cones(), track.world_bounds(), final_path, out,
+                             timestamps=profile.time.tolist(), fps=args.fps, duration=args.duration,
+                             label=f"{selected_track.name} - {planner_names[0]}", jobs=args.jobs)
+    print(f"{n_frames} frames exported, estimated lap time {profile.lap_time:.2f} s", file=sys.stderr)
 
-        if 1 <= track_choice <= 3:
-            selected_track = data_dir / TRACKS[track_choice - 1]
-
-            # 1. Load Data
-            print(f"Loading {selected_track}...")
-            cones = load_track(selected_track)
-            start_pos = get_start_pos(cones)
-
-            if not start_pos:
-                start_pos = (0, 0)
 
-            # Separate cones by color for the algorithm
-            yellow_cones = [(c['x'], c['y']) for c in cones if c['tag'] == 'yellow']
-            blue_cones = [(c['x'], c['y']) for c in cones if c['tag'] == 'blue']
+if __name__ == "__main__":
+    args = parse_args()
+    planner_names = args.planner or [DEFAULT_PLANNER]
+    planner_options = {"seed": args.seed}
+    if args.time_limit is not None:
+        planner_options["time_limit"] = args.time_limit
+    planner_options["collision_z"] = None if args.fixed_margin else args.collision_z
 
-            # 2. Compute Path (Centerline + Smoothing)
-            print("Computing centerline...")
-            processor = PathProcessor()
-            world_bounds = compute_world_bounds(cones)
+    # Setup paths
+    root = Path(__file__).resolve().parents[1]
+    data_dir = root / "data"
 
-            raw_path = processor.compute_track_centerline(yellow_cones, blue_cones, start_pos)
+    try:
+        if args.track is not None:
+            selected_track = Path(args.track)
+            if not selected_track.exists():
+                selected_track = data_dir / args.track
+        else:
+            selected_track = choose_track(data_dir)
 
-            if not raw_path:
-                print("Error: Could not compute a valid path.")
+        if selected_track is not None:
+            # 1. Load Data
+            print(f"Loading {selected_track}...",
+                  file=sys.stderr if "-" in (args.export, args.output) else sys.stdout)
+            track = load_track_arrays(selected_track)
+            # Pairing, ordering and collision structures are shared by all the planners
+            context = TrackContext.from_track(track)
+            world_bounds = track.world_bounds()
+
+            if args.no_gui:
+                plan_only(args, context, planner_names, planner_options)
+            elif args.export is not None:
+                # Headless: plan, then render the frames at a fixed time step
+                export_frames(args, selected_track, track, context, planner_names, planner_options)
             else:
-                print(f"Raw path found: {len(raw_path)} points.")
+                # pygame is only loaded for the window
+                from core.planning_worker import PlanningWorker
+                from ui.process_pygame import process_pygame
 
-                print("Smoothing path...")
-                final_path = processor.smooth_path(raw_path)
-                print(f"Final smooth path: {len(final_path)} points.")
+                # 2. Compute Path (Centerline + Smoothing) in the background
+                print(f"Computing centerline with {', '.join(planner_names)}...")
+                worker = PlanningWorker(planner_names, context, spacing=args.spacing, **planner_options)
+                worker.start()
 
-                # 3. Launch Visualization
-                # We pass the path to process_pygame which handles the car simulation
-                process_pygame(selected_track, cones, world_bounds, path=final_path)
+                # 3. Launch Visualization right away
+                # process_pygame draws the path as its segments arrive, then the car follows
+                # the velocity profile of the smoothed path
+                process_pygame(selected_track, track.to_cones(), world_bounds, updates=worker.updates)
 
-        else:
-            print("Invalid choice.")
-
-    except ValueError:
-        print("Please enter a valid number.")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
-
@@ -0,0 +1,257 @@
+"""
+Long-lived planning service: JSON requests in, smoothed paths out, one JSON
+object per line. Worker processes import the planners once and keep their
+PathProcessor instances, so a request only pays for its planning.
+
+    python src/service.py --jobs 4 < requests.jsonl > responses.jsonl
+    python src/service.py --socket /tmp/planner.sock
+
+Request (only one of the cone sources is needed):
+    {"id": 1, "planner": "rrt", "yellow": [[x, y], ...], "blue": [[x, y], ...],
+     "start": [x, y], "options": {"seed": 0}, "spacing": 0.5, "instrument": false}
+    {"id": 2, "planner": "mincurv", "track": "data/Spa_cones.csv"}
+Response, in completion order (match it with id):
+    {"id": 1, "path": [[x, y], ...], "raw_points": n, "lap_time": s, "seconds": s, "stats": {...}}
+    {"id": 1, "error": "message"}
+"""
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core.planners import DEFAULT_PLANNER, available_planners, create_planner
+from core.spatial_index import preload_kdtree
+from core.track_context import TrackContext
+from core.velocity_profile import compute_velocity_profile
+from utils.track_utils import load_track_arrays
+
+# Planners of a worker process, by (name, options): built once, reused by every request
+_planners = {}
+
+
+def _warm_up():
+    """Worker initializer: imports the planner modules before the first request arrives."""
+    # The planners print progress messages: stdout may carry the responses
+    sys.stdout = sys.stderr
+    preload_kdtree()
+    for name in available_planners():
+        create_planner(name)
+
+
+def _get_planner(name, options, instrument):
+    if instrument:
+        # Counters are per request: an instrumented planner is never shared
+        return create_planner(name, instrument=True, **options)
+    key = (name, json.dumps(options, sort_keys=True))
+    planner = _planners.get(key)
+    if planner is None:
+        planner = _planners[key] = create_planner(name, **options)
+    return planner
+
+
+def _request_context(request):
+    if "track" in request:
+        track = load_track_arrays(request["track"])
+        return TrackContext.from_track(track)
+    return TrackContext(request["yellow"], request["blue"], request.get("start", (0.0, 0.0)))
+
+
+def handle_request(request):
+    """Plans and smooths one request (a decoded JSON object). Returns the response dict."""
+    response = {"id": request.get("id")}
+    try:
+        t0 = time.perf_counter()
+        context = _request_context(request)
+        options = dict(request.get("options", {}))
+        # Requests are spread across the service workers, each request is planned in one process
+        options["workers"] = 1
+        planner = _get_planner(request.get("planner", DEFAULT_PLANNER), options, request.get("instrument", False))
+        raw_path = planner.compute_from_context(context)
+        path = planner.smooth_path(raw_path, request.get("spacing")) if raw_path else []
+        response["seconds"] = time.perf_counter() - t0
+    except Exception as e:  # Malformed request, unreadable track, time limit...
+        response["error"] = f"{type(e).__name__}: {e}"
+        return response
+
+    if not raw_path:
+        response["error"] = "Could not compute a valid path."
+        return response
+    response["path"] = [[float(x), float(y)] for x, y in path]
+    response["raw_points"] = len(raw_path)
+    response["lap_time"] = compute_velocity_profile(path).lap_time if len(path) > 2 else None
+    response["stats"] = planner.stats
+    if planner.instrumentation is not None:
+        response["instrumentation"] = planner.instrumentation.as_dict()
+    return response
+
+
+class PlanningService:
+    """
+    Queue of requests over a pool of warm worker processes. At most `backlog`
+    requests are in flight, so a fast client cannot fill the memory.
+    """
+
+    def __init__(self, jobs=None, backlog=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.backlog = backlog or 4 * self.jobs
+        self.executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_warm_up)
+        self._executor_lock = threading.Lock()
+        self._in_flight = 0
+        self._changed = threading.Condition()
+
+    def submit(self, line, reply):
+        """
+        Queues the request of one JSON line; reply(response) is called from a
+        helper thread once it is planned.
+        """
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+        except ValueError as e:
+            reply({"id": None, "error": f"Invalid request: {e}"})
+            return
+
+        with self._changed:
+            self._changed.wait_for(lambda: self._in_flight < self.backlog)
+            self._in_flight += 1
+        try:
+            future = self._submit(request)
+        except Exception as e:  # Pool shut down, or broken again right away
+            self._release()
+            reply({"id": request.get("id"), "error": f"{type(e).__name__}: {e}"})
+            return
+
+        def done(f):
+            try:
+                response = f.result()
+            except Exception as e:  # Worker crash (e.g. BrokenProcessPool)
+                response = {"id": request.get("id"), "error": f"{type(e).__name__}: {e}"}
+            try:
+                reply(response)
+            finally:
+                self._release()
+
+        future.add_done_callback(done)
+
+    def _submit(self, request):
+        executor = self.executor
+        try:
+            return executor.submit(handle_request, request)
+        except BrokenProcessPool:
+            # A worker died (crash, OOM kill): the pool refuses every new request, a new one replaces it
+            with self._executor_lock:
+                if self.executor is executor:
+                    self.executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_warm_up)
+                    executor.shutdown(wait=False)
+            return self.executor.submit(handle_request, request)
+
+    def _release(self):
+        with self._changed:
+            self._in_flight -= 1
+            self._changed.notify_all()
+
+    def serve_stream(self, lines, out):
+        """Answers every line of lines, writing the responses to the text stream out."""
+        lock = threading.Lock()
+
+        def reply(response):
+            data = json.dumps(response) + "\n"
+            with lock:
+                out.write(data)
+                out.flush()
+
+        for line in lines:
+            if line.strip():
+                self.submit(line, reply)
+        self.join()
+
+    def join(self):
+        """Waits until every queued request is answered."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._in_flight == 0)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        out = self.wfile
+        lock = threading.Lock()
+        pending = threading.Semaphore(0)
+        submitted = 0
+
+        def reply(response):
+            try:
+                with lock:
+                    out.write((json.dumps(response) + "\n").encode())
+                    out.flush()
+            except OSError:
+                pass  # Client gone: the response is dropped
+            finally:
+                pending.release()
+
+        for line in self.rfile:
+            if line.strip():
+                submitted += 1
+                self.server.service.submit(line.decode(), reply)
+        for _ in range(submitted):
+            pending.acquire()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve_socket(service, path):
+    """Serves the requests of every client of the Unix socket path until Ctrl+C or SIGTERM."""
+    if os.path.exists(path):
+        os.unlink(path)
+    signal.signal(signal.SIGTERM, _interrupt)
+    with _UnixServer(path, _ConnectionHandler) as server:
+        server.service = service
+        print(f"Planning service listening on {path} ({service.jobs} workers)", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="JSON-lines path planning service with a warm worker pool.")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all the cores)")
+    parser.add_argument("--backlog", type=int, default=None,
+                        help="Requests in flight at most (default: 4 per worker)")
+    parser.add_argument("--socket", default=None, metavar="PATH",
+                        help="Listen on a Unix socket instead of stdin/stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = PlanningService(args.jobs, args.backlog)
+    try:
+        if args.socket is not None:
+            serve_socket(service, args.socket)
+        else:
+            service.serve_stream(sys.stdin, sys.stdout)
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
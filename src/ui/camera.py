@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def compute_fit_zoom(world_bounds, screen_size):
     min_x, max_x, min_y, max_y = world_bounds
     screen_w, screen_h = screen_size
@@ -28,6 +31,45 @@ class Camera:
         sy = -(wy - self.cy) * self.zoom + sh / 2.0
         return int(sx), int(sy)
 
+    def world_to_screen_array(self, points, screen_size, out=None):
+        """
+        Batch world_to_screen for an (n, 2) array of world points.
+        Coordinates are truncated like int() but kept as floats; out (an (n, 2)
+        float array) receives the result to avoid an allocation per call.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if out is None:
+            out = np.empty_like(points)
+        sw, sh = screen_size
+        np.subtract(points[:, 0], self.cx, out=out[:, 0])
+        out[:, 0] *= self.zoom
+        out[:, 0] += sw / 2.0
+        np.subtract(self.cy, points[:, 1], out=out[:, 1])
+        out[:, 1] *= self.zoom
+        out[:, 1] += sh / 2.0
+        np.trunc(out, out=out)
+        return out
+
+    @staticmethod
+    def visible_mask(screen_points, screen_size, margin=0.0):
+        """True for the screen points inside the viewport grown by margin pixels."""
+        sw, sh = screen_size
+        x = screen_points[:, 0]
+        y = screen_points[:, 1]
+        return (x >= -margin) & (x <= sw + margin) & (y >= -margin) & (y <= sh + margin)
+
+    @staticmethod
+    def visible_segments(screen_points, screen_size, margin=0.0):
+        """
+        True for each segment i (point i -> i + 1) whose bounding box overlaps the
+        viewport grown by margin pixels.
+        """
+        sw, sh = screen_size
+        x0, x1 = screen_points[:-1, 0], screen_points[1:, 0]
+        y0, y1 = screen_points[:-1, 1], screen_points[1:, 1]
+        return ((np.maximum(x0, x1) >= -margin) & (np.minimum(x0, x1) <= sw + margin)
+                & (np.maximum(y0, y1) >= -margin) & (np.minimum(y0, y1) <= sh + margin))
+
     def screen_to_world(self, sx, sy, screen_size):
         sw, sh = screen_size
         wx = (sx - sw / 2.0) / self.zoom + self.cx
@@ -0,0 +1,98 @@
+import math
+import os
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Headless rendering: no window is opened, so no display is needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+# The pygame banner is printed on stdout, where the raw frames may be written
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from ui.camera import Camera
+from ui.process_pygame import COLORS, WIDTH, HEIGHT, car_surface, draw_car, draw_static_layer
+
+
+def _save_png(args):
+    data, size, file_name = args
+    pygame.image.save(pygame.image.frombytes(data, size, "RGB"), file_name)
+
+
+def render_frames(cones, world_bounds, path, out, timestamps=None, fps=30, duration=None, size=(WIDTH, HEIGHT),
+                  label="", jobs=1):
+    """
+    Renders the track, the path and the car animation at a fixed time step of
+    1 / fps, without event loop nor frame-rate throttle.
+
+    out : directory receiving frame_00000.png, frame_00001.png, ... or a binary
+        stream (e.g. sys.stdout.buffer piped to ffmpeg) receiving raw RGB24 frames.
+    timestamps : time (s) of each path point (VelocityProfile.time); without it the
+        car moves one path point per frame, as in process_pygame.
+    duration : simulated time (s), one lap by default.
+    jobs : processes encoding the PNG frames (PNG compression costs far more than
+        drawing a frame); raw frames are always written by the caller's process.
+    Returns the number of frames written.
+    """
+    pygame.font.init()
+    camera = Camera(world_bounds, size)
+    width = size[0]
+
+    # Same proportions as the initial window of process_pygame
+    cone_points = np.array([(c["x"], c["y"]) for c in cones], dtype=float).reshape(-1, 2)
+    path_points = np.asarray(path, dtype=float).reshape(-1, 2) if path else None
+    buffers = {"cones": np.empty_like(cone_points),
+               "path": None if path_points is None else np.empty_like(path_points)}
+    font = pygame.font.SysFont("Arial", 20)
+    static_layer = pygame.Surface(size)
+    draw_static_layer(static_layer, camera, cone_points,
+                      [COLORS.get(c["tag"], (200, 200, 200)) for c in cones],
+                      [c["tag"] == "car_start" for c in cones],
+                      path_points, width * 0.005, width * 0.0083, 1.0,
+                      font.render(label, True, (200, 200, 200)), buffers)
+    car_surf = car_surface(None, max(8, int(width * 0.024)), max(4, int(width * 0.012)))
+
+    timed = bool(path) and timestamps is not None and len(timestamps) == len(path) and timestamps[-1] > 0
+    if duration is not None:
+        n_frames = math.ceil(duration * fps)
+    elif timed:
+        n_frames = math.ceil(timestamps[-1] * fps)
+    else:
+        n_frames = len(path) if path else 1
+
+    to_dir = isinstance(out, (str, Path))
+    if to_dir:
+        Path(out).mkdir(parents=True, exist_ok=True)
+    executor = ProcessPoolExecutor(max_workers=jobs) if to_dir and jobs > 1 else None
+    pending = deque()  # PNG frames being encoded, bounded to keep memory flat
+
+    frame = pygame.Surface(size)
+    try:
+        for k in range(n_frames):
+            frame.blit(static_layer, (0, 0))
+            if path and len(path) > 1:
+                if timed:
+                    car_path_index = bisect_right(timestamps, (k / fps) % timestamps[-1]) - 1
+                else:
+                    car_path_index = k % len(path)
+                draw_car(frame, camera, path, car_path_index, car_surf)
+
+            if not to_dir:
+                out.write(pygame.image.tobytes(frame, "RGB"))
+            elif executor is None:
+                pygame.image.save(frame, str(Path(out) / f"frame_{k:05d}.png"))
+            else:
+                if len(pending) >= 2 * jobs:
+                    pending.popleft().result()
+                pending.append(executor.submit(
+                    _save_png, (pygame.image.tobytes(frame, "RGB"), size, str(Path(out) / f"frame_{k:05d}.png"))))
+        for future in pending:
+            future.result()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return n_frames
@@ -1,5 +1,8 @@
 import pygame
 import math
+import queue
+import numpy as np
+from bisect import bisect_right
 
 from ui.camera import Camera
 
@@ -19,7 +22,80 @@ PAN_SPEED = 400
 LOOKAHEAD_INDEX = 5
 
 
-def process_pygame(csv_file, cones, world_bounds, path=None):
+def draw_static_layer(surface, camera, cone_points, cone_colors, cone_is_start, path_points, base_cone_radius_px,
+                      base_start_radius_px, display_scale, help_text, buffers):
+    """
+    Draws everything but the car: background, path, cones and help text.
+    Points are projected in one call per array (into the buffers dict) and
+    those outside the window are culled before the draw calls.
+    """
+    screen_size = surface.get_size()
+    surface.fill(BACKGROUND_COLOR)
+
+    if path_points is not None and len(path_points) > 1:
+        screen_points = camera.world_to_screen_array(path_points, screen_size, out=buffers["path"])
+        # Consecutive visible segments are drawn as one polyline
+        visible = np.flatnonzero(Camera.visible_segments(screen_points, screen_size, margin=3))
+        if len(visible):
+            breaks = np.flatnonzero(np.diff(visible) > 1)
+            starts = np.concatenate(([visible[0]], visible[breaks + 1]))
+            ends = np.concatenate((visible[breaks], [visible[-1]])) + 1
+            for first, last in zip(starts.tolist(), ends.tolist()):
+                run = screen_points[first:last + 1].tolist()
+                pygame.draw.lines(surface, COLORS["path_line"], False, run, 3)
+                pygame.draw.aalines(surface, COLORS["path_line"], False, run)
+
+    if len(cone_points):
+        zoom_scale = (camera.zoom / camera.base_zoom) * display_scale
+        cone_radius = max(2, int(base_cone_radius_px * zoom_scale))
+        start_radius = max(2, int(base_start_radius_px * zoom_scale))
+        screen_points = camera.world_to_screen_array(cone_points, screen_size, out=buffers["cones"])
+        visible = Camera.visible_mask(screen_points, screen_size, margin=max(cone_radius, start_radius))
+        for i, (sx, sy) in zip(np.flatnonzero(visible).tolist(), screen_points[visible].tolist()):
+            radius = start_radius if cone_is_start[i] else cone_radius
+            pygame.draw.circle(surface, cone_colors[i], (sx, sy), radius)
+
+    surface.blit(help_text, (10, 10))
+
+
+def car_surface(car_surf, car_l, car_w):
+    """Unrotated car sprite of the given size, reused while the size does not change."""
+    if car_surf is None or car_surf.get_size() != (car_l, car_w):
+        car_surf = pygame.Surface((car_l, car_w), pygame.SRCALPHA)
+        pygame.draw.rect(car_surf, COLORS["car_body"], (0, 0, car_l, car_w))
+        pygame.draw.rect(car_surf, COLORS["car_front"], (car_l * 0.7, 0, car_l * 0.3, car_w))
+    return car_surf
+
+
+def draw_car(surface, camera, path, car_path_index, car_surf):
+    """Draws the car at path[car_path_index], heading towards the lookahead point."""
+    screen_size = surface.get_size()
+    cx, cy = path[car_path_index]
+    scx, scy = camera.world_to_screen(cx, cy, screen_size)
+
+    target_index = min(len(path) - 1, car_path_index + LOOKAHEAD_INDEX)
+
+    angle = 0.0
+    if target_index > car_path_index:
+        nx, ny = path[target_index]
+
+        angle = math.degrees(math.atan2(ny - cy, nx - cx))
+
+    elif car_path_index > 0:
+        px, py = path[car_path_index - 1]
+        angle = math.degrees(math.atan2(cy - py, cx - px))
+
+    rotated_car = pygame.transform.rotate(car_surf, angle)
+    rect = rotated_car.get_rect(center=(scx, scy))
+
+    surface.blit(rotated_car, rect)
+
+
+def process_pygame(csv_file, cones, world_bounds, path=None, timestamps=None, updates=None):
+    # timestamps (s, one per path point, e.g. VelocityProfile.time): the car follows
+    # the velocity profile in real time instead of moving one point per frame
+    # updates (queue of core.planning_worker.PlanningWorker messages): the path is
+    # planned in the background and drawn as it grows
     pygame.init()
 
     screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
@@ -46,6 +122,29 @@ def process_pygame(csv_file, cones, world_bounds, path=None):
     last_mouse_pos = None
 
     car_path_index = 0
+    sim_time = 0.0
+
+    font = pygame.font.SysFont("Arial", 20)
+    help_text = font.render(
+        "Zoom: molette | Déplacement: Clic-gauche+glisser | Taille: Flèches | Reset: R",
+        True,
+        (200, 200, 200), )
+    static_layer = None
+    static_layer_key = None
+    car_surf = None
+
+    # World coordinates as arrays, projected in one call when the static layer is rebuilt
+    cone_points = np.array([(c["x"], c["y"]) for c in cones], dtype=float).reshape(-1, 2)
+    cone_colors = [COLORS.get(c["tag"], (200, 200, 200)) for c in cones]
+    cone_is_start = [c["tag"] == "car_start" for c in cones]
+    path_points = np.asarray(path, dtype=float).reshape(-1, 2) if path else None
+    buffers = {"cones": np.empty_like(cone_points),
+               "path": None if path_points is None else np.empty_like(path_points)}
+    timed = bool(path) and timestamps is not None and len(timestamps) == len(path) and timestamps[-1] > 0
+
+    preview = []  # Raw path received so far, drawn until the final path arrives
+    path_version = 0
+    status_text = font.render("Planification en cours...", True, (200, 200, 200)) if updates is not None else None
 
     while running:
         dt = clock.tick(FPS) / 1000.0
@@ -105,6 +204,7 @@ def process_pygame(csv_file, cones, world_bounds, path=None):
                     camera = Camera(world_bounds, screen.get_size())
                     display_scale = 1.0
                     car_path_index = 0
+                    sim_time = 0.0
 
             elif event.type == pygame.MOUSEWHEEL:
                 if event.y > 0:
@@ -123,73 +223,64 @@ def process_pygame(csv_file, cones, world_bounds, path=None):
 
         display_scale = max(0.1, min(display_scale, 10.0))
 
-        screen.fill(BACKGROUND_COLOR)
+        # Messages of the background planning, drained once per frame
+        if updates is not None:
+            path_changed = False
+            while True:
+                try:
+                    message = updates.get_nowait()
+                except queue.Empty:
+                    break
+                if message[0] == "segment":
+                    preview.extend(message[1])
+                elif message[0] == "reset":
+                    preview = []
+                elif message[0] == "path":
+                    path, timestamps = message[1], message[2]
+                    timed = len(timestamps) == len(path) and timestamps[-1] > 0
+                    car_path_index = 0
+                    sim_time = 0.0
+                    preview = []
+                    status_text = None
+                else:
+                    status_text = font.render(message[1], True, (255, 80, 80))
+                path_changed = True
+
+            if path_changed:
+                drawn = path if path else preview
+                path_points = np.asarray(drawn, dtype=float).reshape(-1, 2) if drawn else None
+                buffers["path"] = None if path_points is None else np.empty_like(path_points)
+                path_version += 1
+
+        # Cones, path and help text only change with the view: they are drawn once to an
+        # offscreen layer, rebuilt when the camera, display_scale, window size or path changes
+        static_key = (camera.zoom, camera.cx, camera.cy, display_scale, screen_size,
+                      base_cone_radius_px, base_start_radius_px, path_version)
+        if static_key != static_layer_key:
+            if static_layer is None or static_layer.get_size() != screen_size:
+                static_layer = pygame.Surface(screen_size).convert()
+            draw_static_layer(static_layer, camera, cone_points, cone_colors, cone_is_start, path_points,
+                              base_cone_radius_px, base_start_radius_px, display_scale, help_text, buffers)
+            static_layer_key = static_key
+
+        screen.blit(static_layer, (0, 0))
+        if status_text is not None:
+            screen.blit(status_text, (10, 40))
 
         if path and len(path) > 1:
-            screen_points = []
-            for pt in path:
-                sx, sy = camera.world_to_screen(pt[0], pt[1], screen_size)
-                screen_points.append((sx, sy))
-
-            if len(screen_points) >= 2:
-                pygame.draw.lines(screen, COLORS["path_line"], False, screen_points, 3)
-                pygame.draw.aalines(screen, COLORS["path_line"], False, screen_points)
-
             if 0 <= car_path_index < len(path):
-                cx, cy = path[car_path_index]
-                scx, scy = camera.world_to_screen(cx, cy, screen_size)
-
-                target_index = min(len(path) - 1, car_path_index + LOOKAHEAD_INDEX)
-
-                angle = 0.0
-                if target_index > car_path_index:
-                    nx, ny = path[target_index]
-
-                    angle = math.degrees(math.atan2(ny - cy, nx - cx))
-
-                elif car_path_index > 0:
-                    px, py = path[car_path_index - 1]
-                    angle = math.degrees(math.atan2(cy - py, cx - px))
-
                 car_w = max(4, int(base_car_width_px * (camera.zoom / camera.base_zoom) * display_scale))
                 car_l = max(8, int(base_car_length_px * (camera.zoom / camera.base_zoom) * display_scale))
+                car_surf = car_surface(car_surf, car_l, car_w)
+                draw_car(screen, camera, path, car_path_index, car_surf)
 
-                car_surf = pygame.Surface((car_l, car_w), pygame.SRCALPHA)
-                pygame.draw.rect(car_surf, COLORS["car_body"], (0, 0, car_l, car_w))
-                pygame.draw.rect(car_surf, COLORS["car_front"], (car_l * 0.7, 0, car_l * 0.3, car_w))
-
-                rotated_car = pygame.transform.rotate(car_surf, angle)
-                rect = rotated_car.get_rect(center=(scx, scy))
-
-                screen.blit(rotated_car, rect)
-
-                car_path_index += 1
-                if car_path_index >= len(path):
-                    car_path_index = 0
-
-        for c in cones:
-            tag = c["tag"]
-            wx, wy = c["x"], c["y"]
-            sx, sy = camera.world_to_screen(wx, wy, screen_size)
-
-            color = COLORS.get(tag, (200, 200, 200))
-
-            if tag == "car_start":
-                base_r = base_start_radius_px
-            else:
-                base_r = base_cone_radius_px
-
-            final_radius = int(base_r * (camera.zoom / camera.base_zoom) * display_scale)
-            radius = max(2, final_radius)
-
-            pygame.draw.circle(screen, color, (sx, sy), radius)
-
-        font = pygame.font.SysFont("Arial", 20)
-        txt = font.render(
-            "Zoom: molette | Déplacement: Clic-gauche+glisser | Taille: Flèches | Reset: R",
-            True,
-            (200, 200, 200), )
-        screen.blit(txt, (10, 10))
+                if timed:
+                    sim_time = (sim_time + dt) % timestamps[-1]
+                    car_path_index = bisect_right(timestamps, sim_time) - 1
+                else:
+                    car_path_index += 1
+                    if car_path_index >= len(path):
+                        car_path_index = 0
 
         pygame.display.flip()
 
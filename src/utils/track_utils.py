@@ -1,5 +1,11 @@
 import csv
+import hashlib
+import json
 import math
+import os
+from pathlib import Path
+
+import numpy as np
 
 
 def load_track(csv_path):
@@ -21,6 +27,186 @@ def load_track(csv_path):
     return cones
 
 
+# Codes of the tag column; tags outside this list get the next free codes per file
+TAGS = ("yellow", "blue", "big_orange", "car_start")
+FLOAT_COLUMNS = ("x", "y", "direction", "x_variance", "y_variance", "xy_covariance")
+CACHE_DIR = "__trackcache__"
+CACHE_VERSION = 1
+
+
+class TrackArrays:
+    """
+    Columnar view of a track: one NumPy array per CSV column, the tag column
+    stored as an integer code (tag_names[code] gives the tag back).
+    """
+
+    def __init__(self, columns, tag_code, tag_names=TAGS):
+        for name in FLOAT_COLUMNS:
+            setattr(self, name, columns[name])
+        self.tag_code = tag_code
+        self.tag_names = tuple(tag_names)
+
+    def __len__(self):
+        return len(self.tag_code)
+
+    def code(self, tag):
+        """Code of the tag, or -1 if the track has no such tag."""
+        return self.tag_names.index(tag) if tag in self.tag_names else -1
+
+    def mask(self, tag):
+        return self.tag_code == self.code(tag)
+
+    def points(self, tag=None):
+        """(n, 2) array of the cone positions, optionally restricted to one tag."""
+        pts = np.column_stack((self.x, self.y))
+        return pts if tag is None else pts[self.mask(tag)]
+
+    def covariances(self, tag=None):
+        """(n, 3) array of the position covariances (x_variance, y_variance, xy_covariance)."""
+        cov = np.column_stack((self.x_variance, self.y_variance, self.xy_covariance))
+        return cov if tag is None else cov[self.mask(tag)]
+
+    def start_pos(self):
+        idx = np.flatnonzero(self.mask("car_start"))
+        if len(idx) == 0:
+            return 0.0, 0.0
+        return float(self.x[idx[0]]), float(self.y[idx[0]])
+
+    def world_bounds(self, margin=2.0):
+        if len(self) == 0:
+            return -10, 10, -10, 10
+        return (float(self.x.min()) - margin, float(self.x.max()) + margin,
+                float(self.y.min()) - margin, float(self.y.max()) + margin)
+
+    def to_cones(self):
+        """Same list of dicts as load_track."""
+        tags = [self.tag_names[c] for c in self.tag_code.tolist()]
+        return [{"tag": tag, "x": x, "y": y} for tag, x, y in zip(tags, self.x.tolist(), self.y.tolist())]
+
+
+def load_track_arrays(csv_path, use_cache=True):
+    """
+    Loads a track CSV as a TrackArrays.
+    The parsed columns are cached in a __trackcache__ directory next to the CSV
+    (structured .npy, memory-mapped on load). The cache is reused while the CSV
+    keeps the same size and mtime, or the same SHA-1 if only the mtime changed.
+    """
+    csv_path = Path(csv_path)
+    try:
+        stat = csv_path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File not found {str(csv_path)!r}")
+
+    if not use_cache:
+        return _parse_track_csv(csv_path)
+
+    cache_dir = csv_path.parent / CACHE_DIR
+    data_file = cache_dir / (csv_path.name + ".npy")
+    meta_file = cache_dir / (csv_path.name + ".json")
+
+    meta = _read_cache_meta(meta_file)
+    if meta is not None and data_file.exists():
+        fresh = meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns
+        if not fresh and meta["size"] == stat.st_size and meta["sha1"] == _sha1(csv_path):
+            # Touched but not modified: refresh the fingerprint only
+            meta["mtime_ns"] = stat.st_mtime_ns
+            _write_json(meta_file, meta)
+            fresh = True
+        if fresh:
+            try:
+                return _from_records(np.load(data_file, mmap_mode="r"), meta["tags"])
+            except (OSError, ValueError):
+                pass  # Unreadable cache: parse the CSV again
+
+    track = _parse_track_csv(csv_path)
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        records = _to_records(track)
+        _write_atomic(data_file, lambda f: np.save(f, records))
+        _write_json(meta_file, {
+            "version": CACHE_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": _sha1(csv_path),
+            "tags": list(track.tag_names),
+        })
+    except OSError:
+        pass  # Read-only data directory: work without cache
+    return track
+
+
+def _parse_track_csv(csv_path):
+    columns = {name: [] for name in FLOAT_COLUMNS}
+    tag_names = list(TAGS)
+    codes = []
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f):
+            tag = row["tag"]
+            if tag not in tag_names:
+                tag_names.append(tag)
+            codes.append(tag_names.index(tag))
+            for name in FLOAT_COLUMNS:
+                # Optional columns (older files only have tag, x, y)
+                columns[name].append(float(row.get(name) or 0.0))
+
+    arrays = {name: np.array(values, dtype=float) for name, values in columns.items()}
+    return TrackArrays(arrays, np.array(codes, dtype=np.int16), tag_names)
+
+
+def _to_records(track):
+    dtype = [("tag_code", np.int16)] + [(name, np.float64) for name in FLOAT_COLUMNS]
+    records = np.empty(len(track), dtype=dtype)
+    records["tag_code"] = track.tag_code
+    for name in FLOAT_COLUMNS:
+        records[name] = getattr(track, name)
+    return records
+
+
+def _from_records(records, tag_names):
+    columns = {name: records[name] for name in FLOAT_COLUMNS}
+    return TrackArrays(columns, records["tag_code"], tag_names)
+
+
+def _read_cache_meta(meta_file):
+    try:
+        with open(meta_file) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    return meta
+
+
+def _write_json(path, obj):
+    _write_atomic(path, lambda f: f.write(json.dumps(obj).encode()))
+
+
+def _write_atomic(path, write):
+    """
+    Calls write(binary file) on a temporary file next to path, then renames it
+    over path: a reader never sees half a file, and processes that memory-map
+    the previous .npy keep their (unlinked) copy instead of a truncated one.
+    The temporary name is per process, so concurrent writers do not collide.
+    """
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
 def compute_world_bounds(cones, margin=2.0):
     if not cones:
         return -10, 10, -10, 10
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# src/ is the import root of the project (python src/main.py)
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC))
@@ -0,0 +1,38 @@
+import numpy as np
+
+from core.collision import ConeCollisionChecker
+
+
+def sampled_free(centers, radii, p0, p1, slack=0.0, n=1001):
+    """Reference: the segment is free if none of n points along it is within a cone radius (+ slack)."""
+    t = np.linspace(0.0, 1.0, n)[:, None]
+    free = []
+    for a, b in zip(p0, p1):
+        pts = a + t * (b - a)
+        d = np.hypot(pts[:, None, 0] - centers[:, 0], pts[:, None, 1] - centers[:, 1])
+        free.append(not np.any(d <= radii + slack))
+    return np.array(free)
+
+
+def test_segments_free_matches_a_sampled_reference():
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(0, 40, (60, 2))
+    p0 = rng.uniform(-5, 45, (300, 2))
+    p1 = p0 + rng.uniform(-6, 6, (300, 2))
+    for radii in (np.full(60, 1.0), rng.uniform(0.3, 1.5, 60)):
+        checker = ConeCollisionChecker(centers, radii)
+        free = checker.segments_free(p0[:, 0], p0[:, 1], p1[:, 0], p1[:, 1])
+        # Sample spacing of at most 9 mm: only segments grazing a cone may differ
+        assert np.all(free <= sampled_free(centers, radii, p0, p1))
+        assert np.all(free >= sampled_free(centers, radii, p0, p1, slack=0.01))
+        assert 0 < free.sum() < len(free)
+        scalar = [checker.segment_free(*a, *b) for a, b in zip(p0, p1)]
+        assert scalar == free.tolist()
+        assert np.array_equal(checker.points_free_mask(p0[:, 0], p0[:, 1]),
+                              sampled_free(centers, radii, p0, p0, n=1))
+
+
+def test_checker_without_cones_is_always_free():
+    checker = ConeCollisionChecker.from_obstacle_list([])
+    assert checker.segments_free([0.0, 1.0], [0.0, 1.0], 5.0, 5.0).tolist() == [True, True]
+    assert checker.segment_free(0.0, 0.0, 5.0, 5.0)
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+from conftest import SRC
+
+
+def test_raw_export_writes_only_frames_to_stdout():
+    width, height, fps, duration = 1200, 800, 5, 1.0
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy")
+    env.pop("PYGAME_HIDE_SUPPORT_PROMPT", None)
+    result = subprocess.run(
+        [sys.executable, str(SRC / "main.py"), "--track", "small_track.csv", "--planner", "midpoints",
+         "--export", "-", "--fps", str(fps), "--duration", str(duration)],
+        cwd=SRC, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    n_frames = int(fps * duration)
+    assert len(result.stdout) == n_frames * width * height * 3
@@ -0,0 +1,33 @@
+import numpy as np
+
+from core.collision import ConeCollisionChecker
+from core.grid_planner import grid_path
+
+
+def assert_free_path(path, checker, skip_first=False, skip_last=False):
+    pts = np.asarray(path, dtype=float)
+    lo = 1 if skip_first else 0
+    hi = len(pts) - (2 if skip_last else 1)
+    for k in range(lo, hi):
+        assert checker.segment_free(pts[k, 0], pts[k, 1], pts[k + 1, 0], pts[k + 1, 1])
+
+
+def test_grid_path_goes_around_a_cone():
+    checker = ConeCollisionChecker([(2.0, 0.0)], 1.0)
+    path = grid_path((0.0, 0.0), (4.0, 0.0), checker)
+    assert path[0] == [0.0, 0.0] and path[-1] == [4.0, 0.0]
+    assert len(path) > 2
+    assert_free_path(path, checker)
+
+
+def test_grid_path_starts_from_a_point_inside_a_cone_margin():
+    # Narrow gate: the start lies within the margin of both gate cones
+    checker = ConeCollisionChecker([(0.0, 1.0), (0.0, -1.0), (3.0, 0.2)], 1.2)
+    start, goal = (0.0, 0.0), (6.0, 0.0)
+    assert not checker.points_free((start[0],), (start[1],))
+    path = grid_path(start, goal, checker)
+    assert path is not None
+    assert path[0] == [0.0, 0.0] and path[-1] == [6.0, 0.0]
+    # Only the first step crosses the margin, towards the nearest free cells
+    assert np.hypot(*np.subtract(path[1], start)) <= 3.0
+    assert_free_path(path, checker, skip_first=True)
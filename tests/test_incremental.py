@@ -0,0 +1,68 @@
+import contextlib
+import io
+
+import numpy as np
+
+from conftest import SRC
+from core.incremental import IncrementalPathProcessor
+from core.planners import create_planner
+from core.track_context import TrackContext
+from utils.track_utils import load_track_arrays
+
+
+def context(track_name):
+    return TrackContext.from_track(load_track_arrays(SRC.parent / "data" / track_name))
+
+
+def length(path):
+    return float(np.hypot(*np.diff(np.asarray(path, dtype=float), axis=0).T).sum())
+
+
+def test_replayed_track_matches_the_midpoints_centerline():
+    ctx = context("Spa_cones.csv")
+    planner = create_planner("incremental")
+    raw_path = planner.compute_from_context(ctx)
+    midpoints = create_planner("midpoints").compute_from_context(ctx)
+    assert planner.closed
+    assert planner.stats["updates"] > 100
+    assert abs(length(raw_path) - length(midpoints)) < 0.01 * length(midpoints)
+    assert len(planner.smooth_path(raw_path)) > len(raw_path)
+
+
+def test_update_only_touches_the_sections_around_the_batch():
+    ctx = context("Spa_cones.csv")
+    processor = IncrementalPathProcessor(start_pos=ctx.start_pos)
+    order = list(ctx.order)
+    touched = []
+    for k in range(0, len(order), 4):
+        batch = []
+        for i in order[k:k + 4]:
+            b = ctx.nearest_blue[i]
+            batch.append({"tag": "yellow", "x": ctx.yellow[i, 0], "y": ctx.yellow[i, 1]})
+            batch.append({"tag": "blue", "x": ctx.blue[b, 0], "y": ctx.blue[b, 1]})
+        touched.append(len(processor.add_cones(batch)))
+    # The work per update depends on the batch, not on the length already mapped
+    assert max(touched) <= 12
+    assert len(processor.centerline()) > 600
+
+
+def test_wide_track_widens_max_width():
+    # Cone pairs about 15 m apart, beyond the default max_width of 8 m
+    ctx = context("small_track.csv")
+    wide = TrackContext(ctx.yellow * 3, ctx.blue * 3, (ctx.start_pos[0] * 3, ctx.start_pos[1] * 3))
+    planner = create_planner("incremental")
+    path = planner.compute_from_context(wide)
+    assert planner.max_width > 8.0
+    assert not planner.stats["fallback"]
+    assert len(path) == len(wide.order) + 1
+
+
+def test_unlinked_checkpoints_fall_back_to_the_midpoints_order():
+    # A yellow cone 100 m away from any blue cone never enters the chain
+    ctx = context("small_track.csv")
+    outlier = TrackContext(np.vstack((ctx.yellow, [[80.0, 80.0]])), ctx.blue, ctx.start_pos)
+    planner = create_planner("incremental")
+    with contextlib.redirect_stdout(io.StringIO()):
+        path = planner.compute_from_context(outlier)
+    assert planner.stats["fallback"]
+    assert path == create_planner("midpoints").compute_from_context(outlier)
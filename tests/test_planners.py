@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+from conftest import SRC
+from core.planners import FallbackPlanner
+from core.planning_worker import PlanningWorker
+
+
+class _StreamingPlanner:
+    def __init__(self, segments, timeout=False):
+        self.segments = segments
+        self.timeout = timeout
+        self.stats = {}
+        self.instrumentation = None
+
+    def compute_from_context(self, context, on_segment=None):
+        path = []
+        for segment in self.segments:
+            path.extend(segment)
+            if on_segment is not None:
+                on_segment(segment)
+        if self.timeout:
+            raise TimeoutError("RRT* : limite de 0.1 s dépassée")
+        return path
+
+
+def test_fallback_withdraws_the_segments_of_a_timed_out_primary():
+    primary = _StreamingPlanner([[(0, 0), (1, 0)], [(1, 0), (2, 0)]], timeout=True)
+    fallback = _StreamingPlanner([[(0, 0), (0, 1), (0, 2)]])
+    planner = FallbackPlanner(primary, fallback)
+
+    # Same handling of the updates as the pygame preview
+    worker = PlanningWorker([], context=None)
+    path = planner.compute_from_context(None, worker._stream)
+    preview = []
+    while not worker.updates.empty():
+        message = worker.updates.get()
+        if message[0] == "segment":
+            preview.extend(message[1])
+        elif message[0] == "reset":
+            preview = []
+
+    assert planner.active is fallback
+    assert planner.stats["fallback_used"]
+    assert preview == path == [(0, 0), (0, 1), (0, 2)]
+
+
+def test_unknown_default_planner_is_rejected_at_startup():
+    env = dict(os.environ, PATH_PLANNER="bogus")
+    result = subprocess.run([sys.executable, "main.py", "--no-gui", "--raw", "--track", "small_track.csv"],
+                            cwd=SRC, env=env, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "Unknown planner 'bogus'" in result.stderr
+    assert "valid number" not in result.stdout
@@ -0,0 +1,46 @@
+import contextlib
+import io
+
+import numpy as np
+
+from conftest import SRC
+from core.instrumentation import Instrumentation
+from core.planners import create_planner
+from core.track_context import TrackContext
+from utils.track_utils import load_track_arrays
+
+
+def context(track_name):
+    return TrackContext.from_track(load_track_arrays(SRC.parent / "data" / track_name))
+
+
+def test_solver_reports_whether_it_converged():
+    planner = create_planner("mincurv", instrument=True)
+    path = planner.compute_from_context(context("small_track.csv"))
+    assert planner.stats["converged"] and planner.stats["solver_iterations"] < 5000
+    assert path[0] == path[-1]
+    planner = create_planner("mincurv", instrument=True)
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        planner.compute_from_context(context("Shanghai_cones.csv"))
+    assert not planner.stats["converged"] and planner.stats["solver_iterations"] == 5000
+    assert "without converging" in out.getvalue()
+    events = [e for e in planner.instrumentation.events if e["event"] == "solver"]
+    assert events[-1]["converged"] is False
+
+
+def test_open_track_is_left_open():
+    ctx = context("small_track.csv")
+    half = ctx.order[:len(ctx.order) // 2]
+    open_ctx = TrackContext(ctx.yellow[half], ctx.blue[ctx.nearest_blue[half]], ctx.start_pos)
+    assert not open_ctx.closed
+    planner = create_planner("mincurv")
+    path = np.asarray(planner.compute_from_context(open_ctx))
+    order = open_ctx.order
+    midpoints = open_ctx.midpoints[order]
+    half_widths = np.hypot(*(open_ctx.yellow[order] - open_ctx.blue[open_ctx.nearest_blue[order]]).T) / 2
+    # Ends across the first and last checkpoints, without a step back across the infield
+    assert np.hypot(*(path[0] - midpoints[0])) < half_widths[0]
+    assert np.hypot(*(path[-1] - midpoints[-1])) < half_widths[-1]
+    assert np.hypot(*np.diff(path, axis=0).T).max() < 2 * planner.step
+    smoothed = np.asarray(planner.smooth_path(path.tolist()))
+    assert np.allclose(smoothed[0], path[0]) and np.allclose(smoothed[-1], path[-1])
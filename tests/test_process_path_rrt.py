@@ -0,0 +1,38 @@
+import contextlib
+import io
+
+from conftest import SRC
+from core.planners import create_planner
+from core.track_context import TrackContext
+from utils.track_utils import load_track_arrays
+
+
+def plan(track_name, **options):
+    context = TrackContext.from_track(load_track_arrays(SRC.parent / "data" / track_name))
+    planner = create_planner("rrt", seed=0, **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        path = planner.compute_from_context(context)
+    return planner, path
+
+
+def test_default_margins_plan_f1_track_without_straight_segments():
+    planner, path = plan("Spa_cones.csv")
+    assert path
+    assert planner.stats["fallback_segments"] == 0
+
+
+def test_checkpoints_inside_a_cone_margin_use_the_grid_fallback():
+    # Shanghai has checkpoints within a cone margin, RRT* cannot reach them
+    planner, path = plan("Shanghai_cones.csv")
+    assert planner.stats["grid_segments"] > 0
+    assert planner.stats["fallback_segments"] == 0
+    planner, path = plan("Shanghai_cones.csv", grid_fallback=False)
+    assert planner.stats["fallback_segments"] > 0
+
+
+def test_instrumentation_times_the_rrt_stages():
+    planner, path = plan("small_track.csv", instrument=True)
+    timers = planner.instrumentation.timers
+    for name in ("sample", "nearest", "check_segment", "find_near_nodes", "choose_parent", "rewire", "segment"):
+        assert timers[name][1] > 0
+    assert planner.stats["grid_segments"] == 0
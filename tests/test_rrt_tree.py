@@ -0,0 +1,44 @@
+import math
+
+import numpy as np
+
+from core.process_path_rrt import RRTStar
+from core.rrt_tree import RRTTree
+
+
+def test_tree_grows_past_its_capacity():
+    tree = RRTTree(cell_size=1.0, capacity=2)
+    tree.add(0.0, 0.0)
+    for i in range(1, 100):
+        tree.add(float(i), 0.5 * i, parent=i - 1, cost=float(i))
+    assert len(tree) == 100 and len(tree.x) >= 100
+    assert tree.parent[0] == -1 and tree.parent[99] == 98 and tree.cost[57] == 57.0
+    assert tree.path_to_root(3) == [[3.0, 1.5], [2.0, 1.0], [1.0, 0.5], [0.0, 0.0]]
+    assert math.isclose(tree.path_length_to_root(99), 99 * math.hypot(1.0, 0.5))
+    assert tree.nearest(40.2, 20.0) == 40
+    assert tree.within_radius(10.0, 5.0, 1.2).tolist() == [9, 10, 11]
+
+
+def planner_with_tree(obstacles):
+    rrt = RRTStar((0.0, 0.0), (10.0, 0.0), obstacles, [-5, 15])
+    rrt.tree = RRTTree(cell_size=rrt.expand_dis)
+    rrt.tree.add(0.0, 0.0)
+    # Detour root -> a -> b, then a new node n next to the root
+    a = rrt.tree.add(1.0, 3.0, 0, math.hypot(1.0, 3.0))
+    b = rrt.tree.add(2.0, 0.0, a, 2 * math.hypot(1.0, 3.0))
+    n = rrt.tree.add(1.0, 0.0, 0, 1.0)
+    return rrt, a, b, n
+
+
+def test_rewire_reparents_nodes_reached_more_cheaply():
+    rrt, a, b, n = planner_with_tree([])
+    rrt.rewire(n, np.array([a, b]))
+    # b is now reached through n; a was already cheaper through the root
+    assert rrt.tree.parent[b] == n and math.isclose(rrt.tree.cost[b], 2.0)
+    assert rrt.tree.parent[a] == 0
+
+
+def test_rewire_keeps_the_parent_when_the_new_edge_collides():
+    rrt, a, b, n = planner_with_tree([(1.5, 0.0, 0.2)])
+    rrt.rewire(n, np.array([a, b]))
+    assert rrt.tree.parent[b] == a
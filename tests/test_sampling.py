@@ -0,0 +1,27 @@
+import numpy as np
+
+from core.sampling import CorridorSampler
+
+
+def straight_corridor(closed):
+    # Pairs 1 m apart along x, 3 m wide
+    x = np.arange(10.0)
+    left = np.column_stack((x, np.full(10, 1.5)))
+    right = np.column_stack((x, np.full(10, -1.5)))
+    return CorridorSampler(left, right, closed=closed)
+
+
+def test_open_corridor_windows_are_clamped_to_its_ends():
+    corridor = straight_corridor(closed=False)
+    rng = np.random.default_rng(0)
+    xs, _ = corridor.local(-2, 1).sample(rng, 2000)
+    assert xs.min() >= 0.0 and xs.max() <= 2.0
+    xs, _ = corridor.local(7, 12).sample(rng, 2000)
+    assert xs.min() >= 7.0 and xs.max() <= 9.0
+
+
+def test_closed_corridor_windows_wrap_around_the_loop():
+    corridor = straight_corridor(closed=True)
+    xs, _ = corridor.local(-1, 0).sample(np.random.default_rng(0), 2000)
+    # Quad -1 joins the last pair back to the first one, across the whole corridor
+    assert xs.max() > 8.0 and xs.min() < 1.0
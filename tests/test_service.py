@@ -0,0 +1,46 @@
+import json
+import os
+
+from conftest import SRC
+from service import PlanningService
+
+REQUEST = json.dumps({"id": 1, "planner": "midpoints", "track": str(SRC.parent / "data" / "small_track.csv")})
+
+
+class _ClosedExecutor:
+    def submit(self, *args, **kwargs):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def test_submit_failure_replies_and_releases_the_slot():
+    service = PlanningService(jobs=1, backlog=1)
+    service.executor.shutdown()
+    service.executor = _ClosedExecutor()
+    responses = []
+    service.submit(REQUEST, responses.append)
+    service.submit(REQUEST, responses.append)  # Would wait forever on a leaked slot
+    service.join()
+    assert [r["id"] for r in responses] == [1, 1]
+    assert all("RuntimeError" in r["error"] for r in responses)
+
+
+def test_broken_pool_is_replaced():
+    service = PlanningService(jobs=1)
+    try:
+        # A worker dies: the pool is broken for every later request
+        crash = service.executor.submit(os._exit, 1)
+        try:
+            crash.result()
+        except Exception:
+            pass
+        responses = []
+        service.submit(REQUEST, responses.append)
+        service.join()
+        assert len(responses) == 1
+        assert "error" not in responses[0]
+        assert len(responses[0]["path"]) > 2
+    finally:
+        service.close()
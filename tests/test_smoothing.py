@@ -0,0 +1,19 @@
+import math
+
+import numpy as np
+
+from core.smoothing import filter_min_distance
+
+
+def test_filter_min_distance_keeps_points_further_than_min_dist_from_the_last_kept():
+    rng = np.random.default_rng(0)
+    # Random walk with dense stretches and long jumps
+    steps = rng.normal(size=(500, 2)) * rng.choice([0.05, 1.0, 3.0], size=(500, 1))
+    points = np.cumsum(steps, axis=0)
+
+    expected = [points[0]]
+    for p in points[1:]:
+        if math.dist(p, expected[-1]) > 1.5:
+            expected.append(p)
+    assert np.array_equal(filter_min_distance(points, 1.5), np.array(expected))
+    assert len(filter_min_distance(np.empty((0, 2)), 1.5)) == 0
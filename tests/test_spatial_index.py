@@ -0,0 +1,68 @@
+import subprocess
+import sys
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from conftest import SRC
+from core import spatial_index
+from core.spatial_index import SpatialHashGrid, nearest_neighbours
+
+
+def test_hash_grid_queries_match_brute_force():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-30, 30, (400, 2))
+    grid = SpatialHashGrid(2.0)
+    for x, y in points:
+        grid.insert(x, y)
+    # Moved points must be found in their new cell only
+    for i in range(0, 400, 7):
+        points[i] = rng.uniform(-30, 30, 2)
+        grid.move(i, *points[i])
+
+    for x, y in rng.uniform(-40, 40, (200, 2)):
+        d = np.hypot(points[:, 0] - x, points[:, 1] - y)
+        assert grid.nearest(x, y) == int(np.argmin(d))
+        for r in (0.5, 3.0, 25.0):
+            assert grid.within_radius(x, y, r) == np.flatnonzero(d <= r).tolist()
+    assert SpatialHashGrid(1.0).nearest(0.0, 0.0) is None
+
+
+def test_nearest_neighbours_matches_the_kd_tree(monkeypatch):
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-50, 50, (300, 2))
+    queries = rng.uniform(-50, 50, (200, 2))
+    _, expected_1 = cKDTree(points).query(queries)
+    _, expected_9 = cKDTree(points).query(queries, k=9)
+    # Brute force (small sets), then the KD-tree branch
+    for limit in (spatial_index.BRUTE_FORCE_PAIRS, 0):
+        monkeypatch.setattr(spatial_index, "BRUTE_FORCE_PAIRS", limit)
+        assert np.array_equal(nearest_neighbours(points, queries), expected_1)
+        assert np.array_equal(nearest_neighbours(points, queries, k=9), expected_9)
+
+
+def test_raw_midpoints_run_does_not_import_scipy():
+    script = (
+        "import runpy, sys\n"
+        "sys.argv = ['main.py', '--track', 'peanut.csv', '--planner', 'midpoints', '--no-gui', '--raw']\n"
+        "runpy.run_path('main.py', run_name='__main__')\n"
+        "print(sorted(m for m in sys.modules if m.split('.')[0] in ('scipy', 'pygame')))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=SRC, capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_greedy_order_matches_a_plain_nearest_unvisited_walk():
+    from core.checkpoints import order_checkpoints
+
+    rng = np.random.default_rng(1)
+    points = rng.uniform(-30, 30, (120, 2))
+    start = (0.0, 0.0)
+    expected = [int(np.argmin(np.hypot(*(points - start).T)))]
+    visited = {expected[0]}
+    while len(expected) < len(points):
+        d = np.hypot(*(points - points[expected[-1]]).T)
+        d[list(visited)] = np.inf
+        expected.append(int(np.argmin(d)))
+        visited.add(expected[-1])
+    assert order_checkpoints(points, start) == expected
@@ -0,0 +1,34 @@
+import numpy as np
+
+from conftest import SRC
+from core.topology import forward_directions, is_closed_loop, start_line, walk_checkpoints
+from core.track_context import TrackContext
+from utils.track_utils import load_track_arrays
+
+
+def small_track():
+    context = TrackContext.from_track(load_track_arrays(SRC.parent / "data" / "small_track.csv"))
+    forward = forward_directions(context.yellow, context.blue[context.nearest_blue])
+    return context.midpoints, forward, start_line(context.big_orange, context.start_pos)
+
+
+def test_walk_visits_every_checkpoint_forward_from_the_start_line():
+    points, forward, start = small_track()
+    order = walk_checkpoints(points, forward, start)
+    assert sorted(order) == list(range(len(points)))
+    assert np.dot(points[order[0]] - start, forward[order[0]]) > 0
+    steps = np.diff(points[order], axis=0)
+    assert np.all((steps * forward[order[:-1]]).sum(axis=1) > 0)
+    assert is_closed_loop(points, order)
+    # Driving the other way round walks the same loop backwards
+    assert walk_checkpoints(points, -forward, start) == order[::-1]
+
+
+def test_open_track_and_stuck_walk():
+    points, forward, start = small_track()
+    half = walk_checkpoints(points, forward, start)[:15]
+    order = walk_checkpoints(points[half], forward[half], start)
+    assert order == list(range(15))
+    assert not is_closed_loop(points[half], order)
+    # Every checkpoint driving east: the walk cannot come back round the loop
+    assert walk_checkpoints(points, np.tile([1.0, 0.0], (len(points), 1)), start) is None
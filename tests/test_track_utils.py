@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import SRC
+from utils.track_utils import CACHE_DIR, load_track_arrays
+
+
+@pytest.fixture
+def track_csv(tmp_path):
+    path = tmp_path / "small_track.csv"
+    shutil.copy(SRC.parent / "data" / "small_track.csv", path)
+    return path
+
+
+def cache_files(path):
+    cache_dir = path.parent / CACHE_DIR
+    return cache_dir / (path.name + ".npy"), cache_dir / (path.name + ".json")
+
+
+def test_cache_is_written_atomically_and_memory_mapped(track_csv):
+    parsed = load_track_arrays(track_csv)
+    data_file, meta_file = cache_files(track_csv)
+    assert data_file.exists() and meta_file.exists()
+    assert not list(data_file.parent.glob("*.tmp"))
+
+    cached = load_track_arrays(track_csv)
+    assert isinstance(cached.x, np.memmap)
+    assert np.array_equal(cached.points(), parsed.points())
+
+
+def test_content_edit_invalidates_the_cache(track_csv):
+    load_track_arrays(track_csv)
+    stat = track_csv.stat()
+    # Same size, different content
+    text = track_csv.read_text()
+    edited = text.replace("-16.7219", "-16.7218", 1)
+    assert edited != text and len(edited) == len(text)
+    track_csv.write_text(edited)
+    os.utime(track_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    track = load_track_arrays(track_csv)
+    assert -16.7218 in track.x
+    assert -16.7219 not in track.x
+
+
+def test_touch_with_same_sha1_keeps_the_cache(track_csv):
+    load_track_arrays(track_csv)
+    data_file, meta_file = cache_files(track_csv)
+    data_mtime = data_file.stat().st_mtime_ns
+    stat = track_csv.stat()
+    os.utime(track_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    track = load_track_arrays(track_csv)
+    assert isinstance(track.x, np.memmap)
+    assert data_file.stat().st_mtime_ns == data_mtime
+    assert json.loads(meta_file.read_text())["mtime_ns"] == track_csv.stat().st_mtime_ns
+
+
+def test_unreadable_cache_is_rebuilt(track_csv):
+    expected = load_track_arrays(track_csv, use_cache=False)
+    load_track_arrays(track_csv)
+    data_file, _ = cache_files(track_csv)
+    data_file.write_bytes(b"not an npy file")
+
+    track = load_track_arrays(track_csv)
+    assert np.array_equal(track.points(), expected.points())
+    # The next load uses the rewritten cache again
+    assert np.array_equal(np.load(data_file)["x"], expected.x)
@@ -0,0 +1,53 @@
+import math
+
+import numpy as np
+
+from conftest import SRC
+from core.planners import create_planner
+from core.track_context import TrackContext
+from core.velocity_profile import compute_velocity_profile, path_curvature
+from utils.track_utils import load_track_arrays
+
+
+def loop_speeds(v2_max, ds, a_accel, a_brake, closed):
+    """Reference: point by point acceleration and braking passes, repeated around a loop until stable."""
+    v2 = list(v2_max)
+    n = len(v2)
+    while True:
+        before = list(v2)
+        for i in range(1, n + 1 if closed else n):
+            j = i % n
+            v2[j] = min(v2[j], v2[i - 1] + 2 * a_accel * ds[i - 1])
+        for i in range(n - 2 if not closed else n - 1, -1, -1):
+            v2[i] = min(v2[i], v2[(i + 1) % n] + 2 * a_brake * ds[i])
+        if v2 == before or not closed:
+            return np.sqrt(np.maximum(v2, 0.0))
+
+
+def test_vectorized_passes_match_the_loop_version():
+    context = TrackContext.from_track(load_track_arrays(SRC.parent / "data" / "small_track.csv"))
+    planner = create_planner("midpoints")
+    path = np.asarray(planner.smooth_path(planner.compute_from_context(context)))
+    limits = dict(v_max=20.0, a_lat=10.0, a_accel=5.0, a_brake=8.0)
+    for closed in (True, False):
+        pts = path[:-1] if closed else path
+        profile = compute_velocity_profile(pts, closed=closed, **limits)
+        curvature = path_curvature(pts, closed=closed)
+        with np.errstate(divide="ignore"):
+            v2_max = np.minimum(np.sqrt(10.0 / np.abs(curvature)), 20.0) ** 2
+        ds = np.hypot(*np.diff(np.vstack((pts, pts[:1])) if closed else pts, axis=0).T)
+        expected = loop_speeds(v2_max, ds, 5.0, 8.0, closed)
+        assert np.allclose(profile.speed, expected)
+        assert profile.speed.min() < 20.0
+
+
+def test_constant_speed_on_a_circle():
+    radius = 20.0
+    angles = np.linspace(0.0, 2 * math.pi, 400, endpoint=False)
+    circle = np.column_stack((radius * np.cos(angles), radius * np.sin(angles)))
+    assert np.allclose(path_curvature(circle), 1.0 / radius, rtol=1e-4)
+    profile = compute_velocity_profile(np.vstack((circle, circle[:1])), v_max=50.0, a_lat=5.0)
+    speed = math.sqrt(5.0 * radius)
+    assert np.allclose(profile.speed, speed, rtol=1e-4)
+    assert math.isclose(profile.lap_time, profile.s[-1] / speed, rel_tol=1e-4)
+    assert len(profile) == len(circle) + 1